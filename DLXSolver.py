@@ -0,0 +1,187 @@
+import time
+
+from SudokuBoard import SudokuBoard, mask_values
+from SudokuSolver import BUDGET_EXHAUSTED, CANCELLED, SOLVED, UNSATISFIABLE, SearchAborted, apply_solution
+
+
+class DLXSolver:
+    # Knuth's Algorithm X with dancing links on the exact-cover form of the
+    # board. Nodes are indices into flat link arrays instead of objects.
+    def __init__(self, board: SudokuBoard):
+        self.board = board
+        self.steps = []
+        self.iterations = 0
+        # matrix rows tried and abandoned
+        self.backtracks = 0
+        self.time = 0
+        self.status = None
+        self.max_nodes = None
+        self.deadline = None
+        self.cancel_event = None
+
+    def build_matrix(self):
+        board = self.board
+        size = board.size
+        topology = board.topology
+        cell_count = topology.cell_count
+        column_count = 4 * cell_count
+
+        # node 0 is the root, nodes 1..column_count are the column headers
+        self.L = [column - 1 for column in range(column_count + 1)]
+        self.R = [column + 1 for column in range(column_count + 1)]
+        self.L[0] = column_count
+        self.R[column_count] = 0
+        self.U = list(range(column_count + 1))
+        self.D = list(range(column_count + 1))
+        self.C = list(range(column_count + 1))
+        self.S = [0] * (column_count + 1)
+        self.candidate = [None] * (column_count + 1)
+
+        # only values left in the propagated domains become matrix rows
+        for idx in range(cell_count):
+            offset = topology.row_of[idx] * size, topology.col_of[idx] * size, topology.box_of[idx] * size
+            for value in mask_values(board.masks[idx]):
+                self.add_row((idx, value), (
+                    1 + idx,
+                    1 + cell_count + offset[0] + value - 1,
+                    1 + 2 * cell_count + offset[1] + value - 1,
+                    1 + 3 * cell_count + offset[2] + value - 1,
+                ))
+
+    def add_row(self, candidate, columns):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        first = len(L)
+        for i, column in enumerate(columns):
+            node = first + i
+            L.append(first + (i - 1) % len(columns))
+            R.append(first + (i + 1) % len(columns))
+            U.append(U[column])
+            D.append(column)
+            C.append(column)
+            self.candidate.append(candidate)
+            D[U[column]] = node
+            U[column] = node
+            S[column] += 1
+
+    def cover(self, column):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        R[L[column]] = R[column]
+        L[R[column]] = L[column]
+        i = D[column]
+        while i != column:
+            j = R[i]
+            while j != i:
+                D[U[j]] = D[j]
+                U[D[j]] = U[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def uncover(self, column):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[column]
+        while i != column:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                D[U[j]] = j
+                U[D[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[column]] = column
+        L[R[column]] = column
+
+    def check_limits(self):
+        # same budgets as SudokuSolver, the clock and event polled every 64 nodes
+        if self.max_nodes is not None and self.iterations > self.max_nodes:
+            raise SearchAborted(BUDGET_EXHAUSTED)
+        if self.iterations & 63 == 0:
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                raise SearchAborted(BUDGET_EXHAUSTED)
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                raise SearchAborted(CANCELLED)
+
+    def search(self, solution):
+        self.iterations += 1
+        self.check_limits()
+        R, D, S = self.R, self.D, self.S
+        if R[0] == 0:
+            return True
+
+        # column with the fewest remaining rows, the exact-cover form of MRV
+        column = R[0]
+        j = R[column]
+        while j != 0:
+            if S[j] < S[column]:
+                column = j
+            j = R[j]
+        if S[column] == 0:
+            return False
+
+        self.cover(column)
+        row = D[column]
+        while row != column:
+            solution.append(self.candidate[row])
+            j = R[row]
+            while j != row:
+                self.cover(self.C[j])
+                j = R[j]
+            if self.search(solution):
+                return True
+            j = self.L[row]
+            while j != row:
+                self.uncover(self.C[j])
+                j = self.L[j]
+            solution.pop()
+            self.backtracks += 1
+            row = D[row]
+        self.uncover(column)
+        return False
+
+    def iter_steps(self, max_nodes=None, timeout=None, cancel_event=None):
+        # exact cover has no partial commitments, steps come after the search
+        self.solve(max_nodes, timeout, cancel_event)
+        yield from self.steps
+
+    def solve(self, max_nodes=None, timeout=None, cancel_event=None):
+        # returns the same outcome dict as SudokuSolver.solve; the board is only
+        # touched once the search has succeeded
+        start_time = time.time()
+        self.max_nodes = max_nodes
+        self.deadline = None if timeout is None else time.perf_counter() + timeout
+        self.cancel_event = cancel_event
+        self.build_matrix()
+        solution = []
+        try:
+            self.status = SOLVED if self.search(solution) else UNSATISFIABLE
+        except SearchAborted as aborted:
+            self.status = aborted.status
+        if self.status == SOLVED:
+            self.steps.extend(apply_solution(self.board, solution))
+        end_time = time.time()
+        self.time = end_time - start_time
+        return {'status': self.status, 'time': self.time, 'nodes': self.iterations, 'backtracks': self.backtracks}
+
+
+if __name__ == "__main__":
+    board = SudokuBoard()
+    sudoku = [  [8, 0, 0, 0, 0, 0, 0, 0, 0],
+                [0, 0, 3, 6, 0, 0, 0, 0, 0],
+                [0, 7, 0, 0, 9, 0, 2, 0, 0],
+                [0, 5, 0, 0, 0, 7, 0, 0, 0],
+                [0, 0, 0, 0, 4, 5, 7, 0, 0],
+                [0, 0, 0, 1, 0, 0, 0, 3, 0],
+                [0, 0, 1, 0, 0, 0, 0, 6, 8],
+                [0, 0, 8, 5, 0, 0, 0, 1, 0],
+                [0, 9, 0, 0, 0, 0, 4, 0, 0]]
+
+    board.fill(sudoku)
+    solver = DLXSolver(board)
+    print("############### Started Solving ###############")
+
+    solver.solve()
+    if board.is_complete():
+        print(f"Sudoku solved in {solver.time:.4f} seconds with {solver.iterations} Iterations:")
+        board.print_board()
+    else:
+        print("No solution found")
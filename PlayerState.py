@@ -0,0 +1,74 @@
+from SudokuBoard import SudokuBoard
+from SudokuSolver import SudokuSolver
+from SudokuTopology import get_topology
+
+
+class PlayerState:
+    # Player Mode board with row/column/box occupancy counts kept up to date
+    # on every edit, so conflict, progress and solved checks are O(1).
+    def __init__(self, puzzle, solution=None):
+        self.size = len(puzzle)
+        self.topology = get_topology(self.size)
+        self.values = [0] * self.topology.cell_count
+        self.given = [False] * self.topology.cell_count
+        # counts[unit_id][value] = cells of that unit holding value
+        self.counts = [[0] * (self.size + 1) for _ in self.topology.units]
+        # extra copies of a value within a unit, summed over all units
+        self.conflicts = 0
+        self.empty = self.topology.cell_count
+        for row in range(self.size):
+            for col in range(self.size):
+                if puzzle[row][col] != 0:
+                    self.set_value(row, col, int(puzzle[row][col]))
+                    self.given[row * self.size + col] = True
+        self.solution = solution if solution is not None else self.solve(puzzle)
+
+    def solve(self, puzzle):
+        # solved once when the board is shown, hints and checks reuse it
+        sudoku_board = SudokuBoard(self.size, 'singles')
+        if not sudoku_board.fill(puzzle):
+            return None
+        SudokuSolver(sudoku_board).solve()
+        return sudoku_board.grid if sudoku_board.is_complete() else None
+
+    def set_value(self, row, col, value):
+        # value 0 clears the cell; returns whether the cell now conflicts
+        idx = row * self.size + col
+        old_value = self.values[idx]
+        if old_value == value:
+            return self.has_conflict(row, col)
+        unit_ids = self.topology.cell_unit_ids[idx]
+        if old_value:
+            for unit_id in unit_ids:
+                self.counts[unit_id][old_value] -= 1
+                if self.counts[unit_id][old_value] >= 1:
+                    self.conflicts -= 1
+        else:
+            self.empty -= 1
+        if value:
+            for unit_id in unit_ids:
+                if self.counts[unit_id][value] >= 1:
+                    self.conflicts += 1
+                self.counts[unit_id][value] += 1
+        else:
+            self.empty += 1
+        self.values[idx] = value
+        return self.has_conflict(row, col)
+
+    def has_conflict(self, row, col):
+        idx = row * self.size + col
+        value = self.values[idx]
+        return bool(value) and any(self.counts[unit_id][value] > 1 for unit_id in self.topology.cell_unit_ids[idx])
+
+    def is_solved(self):
+        return self.empty == 0 and self.conflicts == 0
+
+    def hint(self):
+        # (row, col, value) for the first empty or wrong cell, None when there is none
+        if self.solution is None:
+            return None
+        for idx, value in enumerate(self.values):
+            row, col = divmod(idx, self.size)
+            if value != self.solution[row][col]:
+                return row, col, self.solution[row][col]
+        return None
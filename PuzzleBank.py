@@ -0,0 +1,236 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+
+from PuzzlePool import DIFFICULTIES
+from sudoku_utils import SudokuUtils
+
+# bank header: magic, format version, board size, record size
+HEADER = struct.Struct('<4sBBH')
+MAGIC = b'SDKB'
+VERSION = 1
+# index sidecar header: magic, number of records it covers, number of keys
+INDEX_HEADER = struct.Struct('<4sII')
+INDEX_MAGIC = b'SDKI'
+# index key: kind (difficulty or clues), value, record count
+INDEX_KEY = struct.Struct('<BBI')
+BY_DIFFICULTY = 0
+BY_CLUES = 1
+DEFAULT_BANK_PATH = os.path.join(os.path.expanduser("~"), ".sudoku_puzzle_bank.bin")
+# difficulty codes stored in records, 0 means unrated
+DIFFICULTY_CODES = {difficulty: code for code, difficulty in enumerate(DIFFICULTIES, 1)}
+DIFFICULTY_NAMES = {code: difficulty for difficulty, code in DIFFICULTY_CODES.items()}
+
+
+def rate_difficulty(clues):
+    # the easiest difficulty whose filled cell count the clues reach
+    ordered = sorted(DIFFICULTIES.items(), key=lambda item: -item[1])
+    for difficulty, filled_cells in ordered:
+        if clues >= filled_cells:
+            return difficulty
+    return ordered[-1][0]
+
+
+def record_struct(size):
+    # packed puzzle, packed solution, clue count, difficulty code, solver nodes
+    packed = (size * size + 1) // 2
+    return struct.Struct(f'<{packed}s{packed}sBBI')
+
+
+def pack_cells(grid):
+    # two cells per byte, high nibble first
+    cells = [int(value) for row in grid for value in row]
+    if len(cells) % 2:
+        cells.append(0)
+    return bytes(cells[i] << 4 | cells[i + 1] for i in range(0, len(cells), 2))
+
+
+def unpack_cells(data, size):
+    cells = []
+    for byte in data:
+        cells.append(byte >> 4)
+        cells.append(byte & 15)
+    return [cells[row * size:(row + 1) * size] for row in range(size)]
+
+
+class PuzzleBankWriter:
+    # Appends fixed-size records to a bank file, creating it when missing, and
+    # rewrites the index sidecar on close.
+    def __init__(self, path=DEFAULT_BANK_PATH, size=9):
+        if size > 15:
+            raise ValueError("Puzzle banks store 4 bits per cell, boards up to 9x9 fit")
+        self.path = path
+        self.record = record_struct(size)
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER.size:
+            with open(path, 'rb') as bank_file:
+                magic, _, size, _ = HEADER.unpack(bank_file.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a puzzle bank")
+            self.record = record_struct(size)
+            self.index = load_index(path, size)
+            self.file = open(path, 'ab')
+        else:
+            self.index = {}
+            self.file = open(path, 'wb')
+            self.file.write(HEADER.pack(MAGIC, VERSION, size, self.record.size))
+        self.size = size
+        self.count = (self.file.tell() - HEADER.size) // self.record.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def append(self, puzzle, solution, difficulty=None, nodes=0):
+        clues = sum(1 for row in puzzle for value in row if value)
+        difficulty = difficulty or rate_difficulty(clues)
+        code = DIFFICULTY_CODES.get(difficulty, 0)
+        self.file.write(self.record.pack(pack_cells(puzzle), pack_cells(solution), clues, code, nodes))
+        self.index.setdefault((BY_DIFFICULTY, code), []).append(self.count)
+        self.index.setdefault((BY_CLUES, clues), []).append(self.count)
+        self.count += 1
+        return self.count - 1
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.close()
+        save_index(self.path, self.index, self.count)
+
+
+def save_index(path, index, count):
+    temp_path = path + ".idx.tmp"
+    with open(temp_path, 'wb') as index_file:
+        index_file.write(INDEX_HEADER.pack(INDEX_MAGIC, count, len(index)))
+        for (kind, value), records in sorted(index.items()):
+            index_file.write(INDEX_KEY.pack(kind, value, len(records)))
+            index_file.write(struct.pack(f'<{len(records)}I', *records))
+    os.replace(temp_path, path + ".idx")
+
+
+def load_index(path, size):
+    # the sidecar is rebuilt from the records when missing or out of date
+    count = (os.path.getsize(path) - HEADER.size) // record_struct(size).size
+    try:
+        with open(path + ".idx", 'rb') as index_file:
+            data = index_file.read()
+        magic, covered, keys = INDEX_HEADER.unpack_from(data)
+        if magic == INDEX_MAGIC and covered == count:
+            index = {}
+            offset = INDEX_HEADER.size
+            for _ in range(keys):
+                kind, value, length = INDEX_KEY.unpack_from(data, offset)
+                offset += INDEX_KEY.size
+                index[kind, value] = list(struct.unpack_from(f'<{length}I', data, offset))
+                offset += 4 * length
+            return index
+    except (OSError, struct.error):
+        pass
+    index = scan_index(path, size, count)
+    try:
+        save_index(path, index, count)
+    except OSError:
+        # a read-only bank still works, it is just scanned on every open
+        pass
+    return index
+
+
+def scan_index(path, size, count):
+    record = record_struct(size)
+    # clue count and difficulty sit right after the two packed grids
+    offset = 2 * ((size * size + 1) // 2)
+    index = {}
+    with open(path, 'rb') as bank_file:
+        data = mmap.mmap(bank_file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for number in range(count):
+                start = HEADER.size + number * record.size + offset
+                clues, code = data[start], data[start + 1]
+                index.setdefault((BY_DIFFICULTY, code), []).append(number)
+                index.setdefault((BY_CLUES, clues), []).append(number)
+        finally:
+            data.close()
+    return index
+
+
+class PuzzleBank:
+    # Read side of a bank file. Records are read straight out of a read-only
+    # mmap, so opening a bank of millions of puzzles loads only its index.
+    def __init__(self, path=DEFAULT_BANK_PATH):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, record_size = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a puzzle bank")
+        self.record = record_struct(self.size)
+        self.count = (len(self.data) - HEADER.size) // record_size
+        self.index = load_index(path, self.size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, number):
+        if not 0 <= number < self.count:
+            raise IndexError(number)
+        puzzle, solution, clues, code, nodes = self.record.unpack_from(
+            self.data, HEADER.size + number * self.record.size)
+        return {
+            'puzzle': unpack_cells(puzzle, self.size),
+            'solution': unpack_cells(solution, self.size),
+            'clues': clues,
+            'difficulty': DIFFICULTY_NAMES.get(code),
+            'nodes': nodes,
+        }
+
+    def indices(self, difficulty=None, clues=None):
+        # record numbers matching both filters, all records when neither is given
+        found = None
+        if difficulty is not None:
+            found = self.index.get((BY_DIFFICULTY, DIFFICULTY_CODES.get(difficulty, 0)), [])
+        if clues is not None:
+            by_clues = self.index.get((BY_CLUES, clues), [])
+            found = by_clues if found is None else sorted(set(found).intersection(by_clues))
+        return range(self.count) if found is None else found
+
+    def random(self, difficulty=None, clues=None, rng=random):
+        numbers = self.indices(difficulty, clues)
+        if not numbers:
+            return None
+        return self[rng.choice(numbers)]
+
+    def close(self):
+        if not self.data.closed:
+            self.data.close()
+        self.file.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate puzzles into a puzzle bank.")
+    parser.add_argument('-o', '--output', default=DEFAULT_BANK_PATH, help="bank file, appended to when it exists")
+    parser.add_argument('-n', '--count', type=int, default=100, help="puzzles to generate per difficulty")
+    parser.add_argument('-d', '--difficulties', nargs='+', choices=list(DIFFICULTIES), default=list(DIFFICULTIES))
+    args = parser.parse_args(argv)
+
+    with PuzzleBankWriter(args.output) as bank:
+        for difficulty in args.difficulties:
+            for _ in range(args.count):
+                SudokuUtils.generate_sudoku(DIFFICULTIES[difficulty], bank=bank)
+            print(f"{difficulty}: {args.count} puzzles", file=sys.stderr)
+        print(f"{bank.count} puzzles in {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
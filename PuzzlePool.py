@@ -0,0 +1,125 @@
+import json
+import os
+import threading
+from collections import deque
+
+from sudoku_utils import SudokuUtils
+
+# filled cells per difficulty, shared with the GUI pickers
+DIFFICULTIES = {'Easy': 60, 'Medium': 45, 'Hard': 30}
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".sudoku_puzzle_pool.json")
+
+
+def generate_puzzle(filled_cells):
+    return SudokuUtils.generate_sudoku(filled_cells).tolist()
+
+
+class PuzzlePool:
+    # Pre-generated puzzles per difficulty. A background thread tops every
+    # pool back up to target once it drops below low_water, and the pools are
+    # saved to cache_path so the next session starts with them.
+    def __init__(self, difficulties=None, target=10, low_water=3, cache_path=DEFAULT_CACHE_PATH, workers=1):
+        self.difficulties = difficulties or DIFFICULTIES
+        self.target = target
+        self.low_water = low_water
+        self.cache_path = cache_path
+        # generation runs in worker processes so it never competes with the
+        # Tk thread for the GIL, 0 generates on the refill thread itself
+        self.workers = workers
+        self.pools = {difficulty: deque() for difficulty in self.difficulties}
+        self.lock = threading.Lock()
+        # save() runs on the refill thread and from stop(), one at a time so
+        # they never share the temp file
+        self.save_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.load()
+
+    def load(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path) as cache_file:
+                cached = json.load(cache_file)
+        except (OSError, ValueError):
+            return
+        with self.lock:
+            for difficulty, puzzles in cached.items():
+                if difficulty in self.pools:
+                    self.pools[difficulty].extend(puzzles)
+
+    def save(self):
+        if not self.cache_path:
+            return
+        with self.save_lock:
+            # snapshot under save_lock too, the last save to finish has the newest pools
+            with self.lock:
+                snapshot = {difficulty: list(pool) for difficulty, pool in self.pools.items()}
+            temp_path = self.cache_path + ".tmp"
+            with open(temp_path, 'w') as cache_file:
+                json.dump(snapshot, cache_file)
+            os.replace(temp_path, self.cache_path)
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.refill_loop, daemon=True)
+            self.thread.start()
+        self.wakeup.set()
+
+    def stop(self, timeout=None):
+        self.stopped.set()
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        self.save()
+
+    def size(self, difficulty):
+        with self.lock:
+            return len(self.pools[difficulty])
+
+    def pop(self, difficulty):
+        # an empty pool falls back to generating on the caller's thread
+        with self.lock:
+            pool = self.pools[difficulty]
+            puzzle = pool.popleft() if pool else None
+            if len(pool) < self.low_water:
+                self.wakeup.set()
+        if puzzle is None:
+            puzzle = generate_puzzle(self.difficulties[difficulty])
+        return puzzle
+
+    def missing(self):
+        # puzzles needed per difficulty, only for pools below the low-water mark
+        with self.lock:
+            return {difficulty: self.target - len(pool)
+                    for difficulty, pool in self.pools.items() if len(pool) < self.low_water}
+
+    def refill_loop(self):
+        executor = None
+        if self.workers:
+            # imported here, so loading the module (e.g. for DIFFICULTIES) stays light
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+
+            executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            while not self.stopped.is_set():
+                self.wakeup.wait()
+                self.wakeup.clear()
+                for difficulty, count in self.missing().items():
+                    filled_cells = self.difficulties[difficulty]
+                    if executor is None:
+                        puzzles = (generate_puzzle(filled_cells) for _ in range(count))
+                    else:
+                        futures = [executor.submit(generate_puzzle, filled_cells) for _ in range(count)]
+                        puzzles = (future.result() for future in as_completed(futures))
+                    for puzzle in puzzles:
+                        if self.stopped.is_set():
+                            return
+                        with self.lock:
+                            self.pools[difficulty].append(puzzle)
+                    self.save()
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
@@ -1,114 +1,597 @@
-import copy
-import queue
 import random
+import time
+from collections import deque
+from itertools import combinations
+
+from SudokuTopology import get_topology
+
+
+def popcount(mask):
+    # number of candidate values left in a domain mask
+    return mask.bit_count()
+
+
+def lowest_bit(mask):
+    return mask & -mask
+
+
+def bit_value(bit):
+    # value represented by a single-bit mask (bit 0 -> value 1)
+    return bit.bit_length()
+
+
+def mask_values(mask):
+    # candidate values of a domain mask in ascending order
+    values = []
+    while mask:
+        bit = mask & -mask
+        values.append(bit.bit_length())
+        mask ^= bit
+    return values
+
+
+# inference rules run to a fixpoint after the basic singleton propagation
+PROPAGATION_RULES = ('hidden_single', 'pointing', 'claiming', 'naked_subset', 'hidden_subset')
+PROPAGATION_LEVELS = {
+    'basic': (),
+    'singles': ('hidden_single',),
+    'intersections': ('hidden_single', 'pointing', 'claiming'),
+    'subsets': PROPAGATION_RULES,
+}
+
 
 class SudokuBoard:
-    def __init__(self, size=9):
+    def __init__(self, size=9, propagation='basic'):
         self.size = size
+        self.topology = get_topology(size)
         self.grid = [[0 for _ in range(size)] for _ in range(size)]
-        self.domains = {(row, col): set(range(1, 10)) for row in range(size) for col in range(size)}
-        
+        # one int bitmask per cell, bit (value - 1) set when value is still possible
+        self.full_mask = (1 << size) - 1
+        self.masks = [self.full_mask] * (size * size)
+        # undo log: (idx, old_mask) for domain reductions, (idx, None) for assignments
+        self.trail = []
+        # search heuristics, kept in step with every domain change and undo:
+        # buckets[k] holds the unassigned cells with k values left (bucket_of
+        # is -1 once a cell is assigned) and support[unit_id][value - 1]
+        # counts the cells of a unit whose domain still holds value
+        cell_count = size * size
+        self.buckets = [set() for _ in range(size)] + [set(range(cell_count))]
+        self.bucket_of = [size] * cell_count
+        self.support = [[len(unit)] * size for unit in self.topology.units]
+        self.free_count = cell_count
+        # a level name from PROPAGATION_LEVELS or an iterable of rule names
+        rules = PROPAGATION_LEVELS[propagation] if isinstance(propagation, str) else tuple(propagation)
+        unknown = set(rules) - set(PROPAGATION_RULES)
+        if unknown:
+            raise ValueError(f"Unknown propagation rules: {', '.join(sorted(unknown))}")
+        self.rules = tuple(rule for rule in PROPAGATION_RULES if rule in rules)
+        # candidates removed by each rule, accumulated over the board's lifetime
+        self.rule_counts = {rule: 0 for rule in self.rules}
+        # instrumentation counters, cumulative like rule_counts
+        self.queue_pops = 0
+        self.wipeouts = 0
+        self.fill_time = 0
+        # conflict-directed backjumping support, off until explain() is called:
+        # reasons[idx][value - 1] holds the decision levels (one bit each)
+        # whose assignments removed value from idx, value_reason[idx] those
+        # that left idx with a single value; moves run at decision level, and
+        # a failed move leaves the levels behind the failure in conflict
+        self.reasons = None
+        self.value_reason = None
+        self.level = 0
+        self.conflict = 0
+
+    @property
+    def domains(self):
+        # read-only dict-of-sets view of the domain masks
+        return {(row, col): set(mask_values(self.masks[row * self.size + col]))
+                for row in range(self.size) for col in range(self.size)}
+
+    def domain_mask(self, row, col):
+        return self.masks[row * self.size + col]
+
+    def explain(self):
+        # starts recording reasons; whatever was removed before counts as level 0
+        cell_count = self.size * self.size
+        self.reasons = [[0] * self.size for _ in range(cell_count)]
+        self.value_reason = [0] * cell_count
+
+    def removal_reason(self, idx):
+        # levels behind every value already gone from idx
+        reasons = self.reasons[idx]
+        mask = self.masks[idx]
+        reason = 0
+        for value_index in range(self.size):
+            if not mask >> value_index & 1:
+                reason |= reasons[value_index]
+        return reason
+
+    def trail_mark(self):
+        return len(self.trail)
+
+    def undo(self, mark):
+        # pops the trail back to mark, restoring domains and clearing assignments
+        trail = self.trail
+        masks = self.masks
+        support = self.support
+        cell_unit_ids = self.topology.cell_unit_ids
+        buckets = self.buckets
+        bucket_of = self.bucket_of
+        while len(trail) > mark:
+            idx, old_mask = trail.pop()
+            if old_mask is None:
+                self.grid[idx // self.size][idx % self.size] = 0
+                self._unassigned(idx)
+                continue
+            mask = masks[idx]
+            if mask & ~old_mask:
+                self._update_heuristics(idx, mask, old_mask)
+                masks[idx] = old_mask
+                continue
+            # _update_heuristics inlined for the usual case, undo only widens
+            row_id, col_id, box_id = cell_unit_ids[idx]
+            added = old_mask & ~mask
+            while added:
+                bit = added & -added
+                added ^= bit
+                value_index = bit.bit_length() - 1
+                support[row_id][value_index] += 1
+                support[col_id][value_index] += 1
+                support[box_id][value_index] += 1
+            bucket = bucket_of[idx]
+            if bucket >= 0:
+                buckets[bucket].discard(idx)
+                bucket = old_mask.bit_count()
+                buckets[bucket].add(idx)
+                bucket_of[idx] = bucket
+            masks[idx] = old_mask
+
+    def _update_heuristics(self, idx, old_mask, new_mask):
+        # moves idx between buckets and adjusts the support counts of its units
+        support = self.support
+        unit_ids = self.topology.cell_unit_ids[idx]
+        removed = old_mask & ~new_mask
+        while removed:
+            bit = removed & -removed
+            removed ^= bit
+            value_index = bit.bit_length() - 1
+            for unit_id in unit_ids:
+                support[unit_id][value_index] -= 1
+        added = new_mask & ~old_mask
+        while added:
+            bit = added & -added
+            added ^= bit
+            value_index = bit.bit_length() - 1
+            for unit_id in unit_ids:
+                support[unit_id][value_index] += 1
+        bucket = self.bucket_of[idx]
+        if bucket >= 0:
+            self.buckets[bucket].discard(idx)
+            bucket = new_mask.bit_count()
+            self.buckets[bucket].add(idx)
+            self.bucket_of[idx] = bucket
+
+    def _assigned(self, idx):
+        self.buckets[self.bucket_of[idx]].discard(idx)
+        self.bucket_of[idx] = -1
+        self.free_count -= 1
+
+    def _unassigned(self, idx):
+        bucket = self.masks[idx].bit_count()
+        self.buckets[bucket].add(idx)
+        self.bucket_of[idx] = bucket
+        self.free_count += 1
+
+    def degree(self, idx):
+        # unassigned peers of a cell, only needed to break MRV ties
+        bucket_of = self.bucket_of
+        return sum(1 for peer in self.topology.peers[idx] if bucket_of[peer] >= 0)
+
     def fill(self, grid, prnt=False):
-        self.grid = [[0 for _ in range(self.size)] for _ in range(self.size)]
-        for row in range(self.size):
-            for col in range(self.size):
-                if grid[row][col] != 0:
-                    self.move(row, col, grid[row][col], prnt)
-        
-    
-    def is_valid_move(self, row, col, value):
-        for i in range(self.size):
-            if self.grid[row][i] == value or self.grid[i][col] == value:
-                if i != col and i != row:
-                    return False
-        # checking 3 * 3 boxes
-        box_start_row = (row // 3) * 3
-        box_start_col = (col // 3) * 3
-        for i in range(3):
-            for j in range(3):
-                if self.grid[box_start_row + i][box_start_col + j] == value:
-                    if box_start_row + i != row and box_start_col + j != col:
-                        return False
+        # returns False when some clue contradicts the ones placed before it
+        return self.fill_cells([value for row in grid for value in row], prnt)
 
+    def fill_cells(self, cells, prnt=False):
+        # like fill, from the size * size values in row-major order; any int
+        # sequence works, bytes and memoryviews straight from sudoku_io included
+        start_time = time.perf_counter()
+        size = self.size
+        if len(cells) != size * size:
+            raise ValueError(f"Expected {size * size} cells, got {len(cells)}")
+        self.grid = [[0 for _ in range(size)] for _ in range(size)]
+        consistent = True
+        for idx, value in enumerate(cells):
+            if value != 0:
+                consistent = self.move(idx // size, idx % size, int(value), prnt) and consistent
+        self.fill_time = time.perf_counter() - start_time
+        return consistent
+
+    def is_valid_move(self, row, col, value):
+        size = self.size
+        grid = self.grid
+        for peer in self.topology.peers[row * size + col]:
+            if grid[peer // size][peer % size] == value:
+                return False
         return True
 
     def move(self, row, col, value, prnt=False):
-        is_consistent, changed_domains = self.arc_consistency(row, col, value)
+        mark = self.trail_mark()
+        is_consistent = self.propagate(row * self.size + col, value)
         if not is_consistent or not self.is_valid_move(row, col, value):
+            self.undo(mark)
             if prnt:
                 print(f"Invalid move: ({row}, {col}) -> {value}")
             return False
         self.grid[row][col] = value
+        self.trail.append((row * self.size + col, None))
+        self._assigned(row * self.size + col)
         if prnt:
             self.print_move(row, col, value)
-            self.print_changed_domains(changed_domains)
+            self.print_changed_domains(self.changed_domains_since(mark))
         return True
 
     def arc_consistency(self, cell_row, cell_col, cell_value, alter_table=True):
-        constraints_queue = queue.Queue()
-        self.original_domains = copy.deepcopy(self.domains)
-        self.domains[(cell_row, cell_col)] = {cell_value}
-        constraints_queue.put((cell_row, cell_col))
-          
-        if not self.revise_neighbors(cell_row, cell_col, constraints_queue):
-            self.domains = self.original_domains
+        mark = self.trail_mark()
+        if not self.propagate(cell_row * self.size + cell_col, cell_value):
             return False, {}
-            
-        while not constraints_queue.empty():
-            row, col = constraints_queue.get()
-            if not self.revise_neighbors(row, col, constraints_queue):
-                self.domains = self.original_domains
-                return False, {}
 
         if not alter_table:
-            self.domains = self.original_domains
+            self.undo(mark)
             return True, {}
 
-        changed_domains = {cell: (self.original_domains[cell].copy(), self.domains[cell].copy()) for cell in self.domains if self.original_domains[cell] != self.domains[cell]}
-        return True, changed_domains
-    
-    def revise_neighbors(self, cell_row, cell_col, constraints_queue):
-        
-        for row in range(self.size):
-            if row == cell_row:
+        return True, self.changed_domains_since(mark)
+
+    def propagate(self, idx, value):
+        # narrows idx to value and propagates to a fixpoint, on failure every
+        # change is undone and False is returned
+        # a cell is queued only when its domain first shrinks to a single
+        # value, so every cell enters the worklist at most once per call
+        constraints_queue = deque()
+        mark = self.trail_mark()
+        if self.reasons is not None:
+            # a decision: the other values go because of this level alone;
+            # failures the rules find are blamed on every level so far
+            level_bit = 1 << self.level
+            reasons = self.reasons[idx]
+            removed = self.masks[idx] & ~(1 << (int(value) - 1))
+            while removed:
+                bit = removed & -removed
+                removed ^= bit
+                reasons[bit.bit_length() - 1] = level_bit
+            self.value_reason[idx] = level_bit
+            self.conflict = (level_bit << 1) - 1
+        self.trail.append((idx, self.masks[idx]))
+        self._update_heuristics(idx, self.masks[idx], 1 << (int(value) - 1))
+        self.masks[idx] = 1 << (int(value) - 1)
+        constraints_queue.append(idx)
+
+        # rules only look inside one unit at a time, and the board was at a
+        # fixpoint before this call, so only units touched since mark need them
+        dirty_units = set()
+        scanned = mark
+        pops = 0
+        while True:
+            while constraints_queue:
+                pops += 1
+                if not self.revise_neighbors(constraints_queue.popleft(), constraints_queue):
+                    return self._propagation_failed(mark, pops)
+            if not self.rules:
+                break
+            for changed_idx, _ in self.trail[scanned:]:
+                dirty_units.update(self.topology.cell_unit_ids[changed_idx])
+            scanned = len(self.trail)
+            changed = self.apply_rules(constraints_queue, sorted(dirty_units))
+            if changed is None:
+                return self._propagation_failed(mark, pops)
+            if not changed:
+                break
+        self.queue_pops += pops
+        return True
+
+    def _propagation_failed(self, mark, pops):
+        self.queue_pops += pops
+        self.wipeouts += 1
+        self.undo(mark)
+        return False
+
+    def changed_domains_since(self, mark):
+        # (old, new) domain of every cell reduced after mark, built from the trail
+        changed_domains = {}
+        for idx, old_mask in self.trail[mark:]:
+            if old_mask is None:
                 continue
-            revised_domain = self.domains[(row, cell_col)].copy()
-            for value in revised_domain:
-                # domain reduction when the cell has only one value
-                if self.domains[(cell_row, cell_col)] == {value}:
-                    self.domains[(row, cell_col)].discard(value)
-                    if len(self.domains[(row, cell_col)]) == 0:
-                        return False
-                    constraints_queue.put((row, cell_col))
-                    
-        for col in range(self.size):
-            if col == cell_col:
+            cell = divmod(idx, self.size)
+            if cell in changed_domains:
                 continue
-            revised_domain = self.domains[(cell_row, col)].copy()
-            for value in revised_domain:
-                if self.domains[(cell_row, cell_col)] == {value}:
-                    self.domains[(cell_row, col)].discard(value)
-                    if len(self.domains[(cell_row, col)]) == 0:
-                        return False
-                    constraints_queue.put((cell_row, col))
-        
-        box_start_row = (cell_row // 3) * 3
-        box_start_col = (cell_col // 3) * 3
-        
-        for row in range(3):
-            for col in range(3):
-                if box_start_row + row == cell_row and box_start_col + col == cell_col:
-                    continue
-                revised_domain = self.domains[(box_start_row + row, box_start_col + col)].copy()
-                for value in revised_domain:
-                    if self.domains[(cell_row, cell_col)] == {value}:
-                        self.domains[(box_start_row + row, box_start_col + col)].discard(value)
-                        if len(self.domains[(box_start_row + row, box_start_col + col)]) == 0:
-                            return False
-                        constraints_queue.put((box_start_row + row, box_start_col + col))
-                        
+            new_mask = self.masks[idx]
+            if old_mask != new_mask:
+                changed_domains[cell] = (set(mask_values(old_mask)), set(mask_values(new_mask)))
+        return dict(sorted(changed_domains.items()))
+    
+    def revise_neighbors(self, cell_idx, constraints_queue):
+        if self.reasons is not None:
+            return self._revise_explained(cell_idx, constraints_queue)
+        masks = self.masks
+        trail = self.trail
+        value_bit = masks[cell_idx]
+        # domain reduction only happens when the cell has a single value left
+        if value_bit & (value_bit - 1):
+            return True
+
+        # _update_heuristics inlined: exactly one value leaves each domain here
+        value_index = value_bit.bit_length() - 1
+        support = self.support
+        cell_unit_ids = self.topology.cell_unit_ids
+        buckets = self.buckets
+        bucket_of = self.bucket_of
+        for idx in self.topology.peers[cell_idx]:
+            mask = masks[idx]
+            if mask & value_bit:
+                trail.append((idx, mask))
+                mask &= ~value_bit
+                masks[idx] = mask
+                row_id, col_id, box_id = cell_unit_ids[idx]
+                support[row_id][value_index] -= 1
+                support[col_id][value_index] -= 1
+                support[box_id][value_index] -= 1
+                bucket = bucket_of[idx]
+                if bucket >= 0:
+                    buckets[bucket].discard(idx)
+                    buckets[bucket - 1].add(idx)
+                    bucket_of[idx] = bucket - 1
+                if mask == 0:
+                    return False
+                if not mask & (mask - 1):
+                    constraints_queue.append(idx)
+
         return True
     
+    def _revise_explained(self, cell_idx, constraints_queue):
+        # revise_neighbors recording why each value leaves a peer: because of
+        # whatever left cell_idx with its value; on a wipeout conflict gets
+        # the levels behind every value the peer lost
+        masks = self.masks
+        value_bit = masks[cell_idx]
+        if value_bit & (value_bit - 1):
+            return True
+        value_index = value_bit.bit_length() - 1
+        reason = self.value_reason[cell_idx]
+        reasons = self.reasons
+        for idx in self.topology.peers[cell_idx]:
+            mask = masks[idx]
+            if mask & value_bit:
+                self.trail.append((idx, mask))
+                self._update_heuristics(idx, mask, mask & ~value_bit)
+                mask &= ~value_bit
+                masks[idx] = mask
+                reasons[idx][value_index] = reason
+                if mask == 0:
+                    self.conflict = 0
+                    for cause in reasons[idx]:
+                        self.conflict |= cause
+                    return False
+                if not mask & (mask - 1):
+                    self.value_reason[idx] = self.removal_reason(idx)
+                    constraints_queue.append(idx)
+        return True
+
+    def _unit_reason(self, unit, bits, skip):
+        # levels that removed the values in bits from the cells of unit but skip
+        reasons = self.reasons
+        reason = 0
+        for idx in unit:
+            if idx != skip:
+                cell_reasons = reasons[idx]
+                remaining = bits
+                while remaining:
+                    bit = remaining & -remaining
+                    remaining ^= bit
+                    reason |= cell_reasons[bit.bit_length() - 1]
+        return reason
+
+    def eliminate(self, idx, bits, constraints_queue, reason=None):
+        # removes bits from a domain, returns False on a wipeout; reason only
+        # matters once explain() was called
+        old_mask = self.masks[idx]
+        self.trail.append((idx, old_mask))
+        mask = old_mask & ~bits
+        self._update_heuristics(idx, old_mask, mask)
+        # narrowed first, removal_reason has to see the values removed here
+        self.masks[idx] = mask
+        if self.reasons is not None:
+            # rules that give no reason are blamed on every level so far
+            if reason is None:
+                reason = (2 << self.level) - 1
+            cell_reasons = self.reasons[idx]
+            removed = old_mask & bits
+            while removed:
+                bit = removed & -removed
+                removed ^= bit
+                cell_reasons[bit.bit_length() - 1] = reason
+            if not mask & (mask - 1):
+                self.value_reason[idx] = self.removal_reason(idx)
+                if not mask:
+                    self.conflict = self.value_reason[idx]
+        if mask == 0:
+            return False
+        if not mask & (mask - 1):
+            constraints_queue.append(idx)
+        return True
+
+    def apply_rules(self, constraints_queue, unit_ids):
+        # runs the enabled rules over the given units and stops at the first
+        # one that narrows a domain; returns the number of candidates it
+        # removed, 0 when nothing applies and None on a contradiction
+        for rule in self.rules:
+            removed = getattr(self, 'apply_' + rule)(constraints_queue, unit_ids)
+            if removed is None:
+                return None
+            if removed:
+                self.rule_counts[rule] += removed
+                return removed
+        return 0
+
+    def apply_hidden_single(self, constraints_queue, unit_ids):
+        # a value with a single place left in a unit must go there
+        masks = self.masks
+        removed = 0
+        for unit_id in unit_ids:
+            unit = self.topology.units[unit_id]
+            once = twice = 0
+            for idx in unit:
+                twice |= once & masks[idx]
+                once |= masks[idx]
+            if once != self.full_mask:
+                if self.reasons is not None:
+                    # a value with no place left: whatever removed it from every cell
+                    self.conflict = self._unit_reason(unit, self.full_mask & ~once, None)
+                return None
+            singles = once & ~twice
+            while singles:
+                bit = singles & -singles
+                singles ^= bit
+                for idx in unit:
+                    mask = masks[idx]
+                    if mask & bit:
+                        if mask != bit:
+                            removed += popcount(mask) - 1
+                            # the value goes here because it left the rest of the unit
+                            reason = None if self.reasons is None else self._unit_reason(unit, bit, idx)
+                            if not self.eliminate(idx, mask & ~bit, constraints_queue, reason):
+                                return None
+                        break
+        return removed
+
+    def apply_pointing(self, constraints_queue, unit_ids):
+        # candidates of a box confined to one row or column leave the rest of that line
+        topology = self.topology
+        removed = 0
+        for unit_id in unit_ids:
+            if unit_id < 2 * self.size:
+                continue
+            box = topology.units[unit_id]
+            for line_of, lines in ((topology.row_of, topology.rows), (topology.col_of, topology.cols)):
+                removed_here = self._confine(box, line_of, lines, constraints_queue)
+                if removed_here is None:
+                    return None
+                removed += removed_here
+        return removed
+
+    def apply_claiming(self, constraints_queue, unit_ids):
+        # candidates of a row or column confined to one box leave the rest of that box
+        topology = self.topology
+        removed = 0
+        for unit_id in unit_ids:
+            if unit_id >= 2 * self.size:
+                continue
+            line = topology.units[unit_id]
+            removed_here = self._confine(line, topology.box_of, topology.boxes, constraints_queue)
+            if removed_here is None:
+                return None
+            removed += removed_here
+        return removed
+
+    def _confine(self, unit, group_of, groups, constraints_queue):
+        # for every value whose places in unit all share one group (line or
+        # box), removes it from the cells of that group outside unit
+        masks = self.masks
+        removed = 0
+        value_bits = 0
+        for idx in unit:
+            mask = masks[idx]
+            if mask & (mask - 1):
+                value_bits |= mask
+        while value_bits:
+            bit = value_bits & -value_bits
+            value_bits ^= bit
+            group = None
+            for idx in unit:
+                if masks[idx] & bit:
+                    if group is None:
+                        group = group_of[idx]
+                    elif group != group_of[idx]:
+                        group = None
+                        break
+            else:
+                if group is None:
+                    continue
+                for idx in groups[group]:
+                    if masks[idx] & bit and idx not in unit:
+                        removed += 1
+                        if not self.eliminate(idx, bit, constraints_queue):
+                            return None
+        return removed
+
+    def apply_naked_subset(self, constraints_queue, unit_ids):
+        # k cells of a unit sharing only k values (k = 2, 3) own those values
+        masks = self.masks
+        removed = 0
+        for unit_id in unit_ids:
+            unit = self.topology.units[unit_id]
+            for k in (2, 3):
+                open_cells = [idx for idx in unit if 2 <= popcount(masks[idx]) <= k]
+                for subset in combinations(open_cells, k):
+                    union = 0
+                    for idx in subset:
+                        union |= masks[idx]
+                    count = popcount(union)
+                    if count < k:
+                        return None
+                    if count > k:
+                        continue
+                    for idx in unit:
+                        if masks[idx] & union and idx not in subset:
+                            removed += popcount(masks[idx] & union)
+                            if not self.eliminate(idx, union, constraints_queue):
+                                return None
+                    if removed:
+                        return removed
+        return removed
+
+    def apply_hidden_subset(self, constraints_queue, unit_ids):
+        # k values of a unit with only k places between them (k = 2, 3) fill those places
+        masks = self.masks
+        removed = 0
+        for unit_id in unit_ids:
+            unit = self.topology.units[unit_id]
+            places = {}
+            for value_bit in (1 << shift for shift in range(self.size)):
+                spots = tuple(idx for idx in unit if masks[idx] & value_bit)
+                if len(spots) >= 2:
+                    places[value_bit] = spots
+            for k in (2, 3):
+                candidates = [bit for bit, spots in places.items() if len(spots) <= k]
+                for subset in combinations(candidates, k):
+                    cells = set()
+                    for bit in subset:
+                        cells.update(places[bit])
+                    if len(cells) < k:
+                        return None
+                    if len(cells) > k:
+                        continue
+                    keep = sum(subset)
+                    for idx in cells:
+                        if masks[idx] & ~keep:
+                            removed += popcount(masks[idx] & ~keep)
+                            if not self.eliminate(idx, ~keep, constraints_queue):
+                                return None
+                    if removed:
+                        return removed
+        return removed
+
+    def select_cell(self, degree=False):
+        # MRV from the buckets: an unassigned cell with the fewest values left,
+        # ties going to the lowest index, or with degree set to the cell with
+        # the most unassigned peers; None once every cell is assigned
+        for bucket in self.buckets:
+            if bucket:
+                if degree:
+                    idx = max(bucket, key=lambda idx: (self.degree(idx), -idx))
+                else:
+                    idx = min(bucket)
+                return divmod(idx, self.size)
+        return None
+
     def find_empty(self):
         # returns all the empty Cells
         empty_cells = []
@@ -139,11 +622,7 @@ class SudokuBoard:
             print(row)
             
     def is_complete(self):
-        for row in self.grid:
-            for cell in row:
-                if cell == 0:
-                    return False
-        return True
+        return self.free_count == 0
         
     ## TODO: Implement the following methods
     
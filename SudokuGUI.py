@@ -1,7 +1,15 @@
+import os
+import queue
+import threading
+
 import customtkinter as ctk
 from tkinter import messagebox
+from PlayerState import PlayerState
+from PuzzleBank import DEFAULT_BANK_PATH, PuzzleBank
+from PuzzlePool import DIFFICULTIES, PuzzlePool
 from SudokuBoard import SudokuBoard
-from SudokuSolver import SudokuSolver
+from SudokuSolver import SOLVED, SearchAborted
+from sudoku_engines import ENGINES, get_solver
 from sudoku_utils import SudokuUtils
 
 class SudokuGUI:
@@ -10,6 +18,20 @@ class SudokuGUI:
         self.root.title("Sudoku Main Menu")
         self.size = 500
         self.root.geometry(f"{self.size}x{self.size}")
+        # milliseconds between animated solver steps, and between step queue polls
+        self.animation_delay = 500
+        self.poll_interval = 20
+        # seconds the entered-board checks may search before giving up
+        self.check_timeout = 5
+        # set to stop a solver thread that is still searching
+        self.cancel_event = threading.Event()
+
+        # difficulty picks pop pre-generated puzzles, refilled in the background
+        self.puzzle_pool = PuzzlePool()
+        self.puzzle_pool.start()
+        # a generated puzzle bank, when there is one, serves the pickers first
+        self.puzzle_bank = PuzzleBank(DEFAULT_BANK_PATH) if os.path.exists(DEFAULT_BANK_PATH) else None
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         self.button_style = {
             "font": ("Helvetica", 14),
@@ -50,6 +72,20 @@ class SudokuGUI:
         
         self.player_mode_button.grid(row=3, column=0)
 
+    def on_close(self):
+        self.cancel_event.set()
+        self.puzzle_pool.stop(timeout=1)
+        if self.puzzle_bank is not None:
+            self.puzzle_bank.close()
+        self.root.destroy()
+
+    def next_puzzle(self, difficulty):
+        if self.puzzle_bank is not None:
+            record = self.puzzle_bank.random(difficulty)
+            if record is not None:
+                return record['puzzle']
+        return self.puzzle_pool.pop(difficulty)
+
     def random_board_ai_mode(self):
         # Create a new window for difficulty selection
         difficulty_window = ctk.CTkToplevel(self.root)
@@ -63,7 +99,7 @@ class SudokuGUI:
         # Create a combobox for difficulty selection
         self.difficulty_var = ctk.StringVar()
         self.difficulty_var.set("Easy")
-        difficulty_combobox = ctk.CTkComboBox(difficulty_window, variable=self.difficulty_var, values=['Easy', 'Medium', 'Hard'])
+        difficulty_combobox = ctk.CTkComboBox(difficulty_window, variable=self.difficulty_var, values=list(DIFFICULTIES))
         difficulty_combobox.pack(pady=10)
 
         # Create a button to start the Random Board AI Mode with the selected difficulty
@@ -73,8 +109,7 @@ class SudokuGUI:
     def start_random_board_ai_mode(self):
         difficulty = self.difficulty_var.get()
         if difficulty:
-            filled_cells = {'Easy': 60, 'Medium': 45, 'Hard': 30}[difficulty]
-            puzzle = SudokuUtils.generate_sudoku(filled_cells)
+            puzzle = self.next_puzzle(difficulty)
             self.display_board(puzzle)
         else:
             pass
@@ -121,14 +156,17 @@ class SudokuGUI:
 
         test_board = [row[:] for row in board]
 
-        if not SudokuUtils.is_solvable(test_board):
-            messagebox.showerror("Invalid Board", "The entered board is not solvable.")
-            return
-        
-        test_board = [row[:] for row in board]
+        try:
+            if not SudokuUtils.is_solvable(test_board, timeout=self.check_timeout):
+                messagebox.showerror("Invalid Board", "The entered board is not solvable.")
+                return
+
+            test_board = [row[:] for row in board]
 
-        if not SudokuUtils.is_unique_solution(test_board):
-            messagebox.showerror("Warning", "The entered board does not have a unique solution.")
+            if not SudokuUtils.is_unique_solution(test_board, timeout=self.check_timeout):
+                messagebox.showerror("Warning", "The entered board does not have a unique solution.")
+        except SearchAborted:
+            messagebox.showerror("Warning", "The entered board could not be checked in time.")
 
         self.display_board(board)
         
@@ -144,7 +182,7 @@ class SudokuGUI:
         # Create a combobox for difficulty selection
         self.difficulty_var = ctk.StringVar()
         self.difficulty_var.set("Easy")
-        difficulty_combobox = ctk.CTkComboBox(difficulty_window, variable=self.difficulty_var, values=['Easy', 'Medium', 'Hard'])
+        difficulty_combobox = ctk.CTkComboBox(difficulty_window, variable=self.difficulty_var, values=list(DIFFICULTIES))
         difficulty_combobox.pack(pady=10)
 
         # Create a button to start the Player Mode with the selected difficulty
@@ -154,13 +192,13 @@ class SudokuGUI:
     def start_player_mode(self):
         difficulty = self.difficulty_var.get()
         if difficulty:
-            filled_cells = {'Easy': 60, 'Medium': 45, 'Hard': 30}[difficulty]
-            puzzle = SudokuUtils.generate_sudoku(filled_cells)
+            puzzle = self.next_puzzle(difficulty)
             self.display_player_board(puzzle)
         else:
             pass
 
     def display_player_board(self, board):
+        self.player_state = PlayerState(board)
         player_window = ctk.CTkToplevel(self.root)
         player_window.title("Player Mode")
         player_window.geometry(f"{self.size}x{self.size}")
@@ -184,22 +222,35 @@ class SudokuGUI:
             self.board_entries.append(row_entries)
 
         submit_button = ctk.CTkButton(player_window, text="Submit", command=self.check_solution)
-        submit_button.grid(row=10, column=0, columnspan=9, pady=10)
+        submit_button.grid(row=10, column=0, columnspan=5, pady=10)
+        hint_button = ctk.CTkButton(player_window, text="Hint", command=self.show_hint)
+        hint_button.grid(row=10, column=5, columnspan=4, pady=10)
 
     def validate_move(self, event, row, col):
         value = event.widget.get()
         if value.isdigit() and 1 <= int(value) <= 9:
-            board = self.get_current_board()
-            if SudokuUtils.is_valid_move(board, row, col, int(value)):
-                self.board_entries[row][col].configure(border_color="white")
-            else:
+            if self.player_state.set_value(row, col, int(value)):
                 self.board_entries[row][col].configure(border_color="red")
+            else:
+                self.board_entries[row][col].configure(border_color="white")
         else:
+            self.player_state.set_value(row, col, 0)
             if value == '':
                 self.board_entries[row][col].configure(border_color="white")
             else:
                 self.board_entries[row][col].configure(border_color="red")
 
+    def show_hint(self):
+        hint = self.player_state.hint()
+        if hint is None:
+            return
+        row, col, value = hint
+        entry = self.board_entries[row][col]
+        entry.delete(0, "end")
+        entry.insert(0, str(value))
+        self.player_state.set_value(row, col, value)
+        entry.configure(border_color="white")
+
     def get_current_board(self):
         board = []
         for row_entries in self.board_entries:
@@ -211,8 +262,7 @@ class SudokuGUI:
         return board
 
     def check_solution(self):
-        board = self.get_current_board()
-        if SudokuUtils.is_valid_solution(board):
+        if self.player_state.is_solved():
             messagebox.showinfo("Congratulations", "You have solved the Sudoku puzzle!")
         else:
             messagebox.showerror("Invalid Solution", "The current board is not a valid solution.")
@@ -248,30 +298,89 @@ class SudokuGUI:
                 row_entries.append(entry)
             self.board_entries.append(row_entries)
 
-        solve_button = ctk.CTkButton(board_window, text="Solve", command=lambda: self.solve_board(board))
-        solve_button.grid(row=10, column=0, columnspan=9, pady=10)
+        self.solve_button = ctk.CTkButton(board_window, text="Solve", command=lambda: self.solve_board(board))
+        self.solve_button.grid(row=10, column=0, columnspan=3, pady=10)
+
+        # solver engine used by the Solve button
+        self.engine_var = ctk.StringVar()
+        self.engine_var.set("backtracking")
+        engine_combobox = ctk.CTkComboBox(board_window, variable=self.engine_var, values=list(ENGINES), width=130)
+        engine_combobox.grid(row=10, column=3, columnspan=3, pady=10)
+
+        skip_button = ctk.CTkButton(board_window, text="Skip to end", command=self.skip_animation, width=100)
+        skip_button.grid(row=10, column=6, columnspan=3, pady=10)
+
+        # delay between animated steps in milliseconds
+        ctk.CTkLabel(board_window, text="Animation delay").grid(row=11, column=0, columnspan=3)
+        self.delay_var = ctk.IntVar(value=self.animation_delay)
+        delay_slider = ctk.CTkSlider(board_window, from_=0, to=1000, variable=self.delay_var)
+        delay_slider.grid(row=11, column=3, columnspan=6, pady=10)
 
     def solve_board(self, board):
+        # the search runs on a worker thread and hands steps over a queue,
+        # the Tk thread only polls the queue and redraws
         current_board = SudokuBoard()
         current_board.fill(board)
         solved_board = SudokuBoard()
         solved_board.fill(current_board.grid)
-        solver = SudokuSolver(solved_board)
-        solver.solve()
-        self.update_board(current_board, solver.steps)
+        solver = get_solver(self.engine_var.get())(solved_board)
+
+        self.step_queue = queue.Queue()
+        self.skipping = False
+        self.last_cell = None
+        self.solve_button.configure(state="disabled")
+        threading.Thread(target=self.run_solver, args=(solver, self.step_queue), daemon=True).start()
+        self.root.after(self.poll_interval, self.update_board, current_board, solver)
+
+    def run_solver(self, solver, step_queue):
+        # the end marker always goes out, or update_board would poll forever
+        try:
+            for step in solver.iter_steps(cancel_event=self.cancel_event):
+                step_queue.put(step)
+        finally:
+            step_queue.put(None)
+
+    def skip_animation(self):
+        self.skipping = True
+
+    def update_board(self, sudoku_board, solver):
+        # draws one step per tick (every step when skipping) and reschedules
+        # itself, so the window never blocks
+        while True:
+            try:
+                step = self.step_queue.get_nowait()
+            except queue.Empty:
+                self.root.after(self.poll_interval, self.update_board, sudoku_board, solver)
+                return
+            if step is None:
+                self.finish_animation(solver)
+                return
+            self.draw_step(sudoku_board, step)
+            if not self.skipping:
+                self.root.after(int(self.delay_var.get()), self.update_board, sudoku_board, solver)
+                return
+
+    def draw_step(self, sudoku_board, step):
+        cell, value = step
+        sudoku_board.move(cell[0], cell[1], value, True)
+        if self.last_cell is not None:
+            self.board_entries[self.last_cell[0]][self.last_cell[1]].configure(border_color="black")
+        entry = self.board_entries[cell[0]][cell[1]]
+        entry.configure(border_color="lightgreen", state="normal")
+        entry.delete(0, 'end')
+        entry.insert(0, str(value))
+        entry.configure(state="readonly")
+        self.last_cell = cell
+
+    def finish_animation(self, solver):
+        if self.last_cell is not None:
+            self.board_entries[self.last_cell[0]][self.last_cell[1]].configure(border_color="black")
+        self.solve_button.configure(state="normal")
+        if solver.status != SOLVED:
+            messagebox.showerror("No Solution", f"The solver stopped without a solution ({solver.status}).")
+            return
         print("Solved in: ", solver.time, " Seconds, and ", solver.iterations, " Steps.")
 
-    def update_board(self,sudoku_board, steps):
-        for step in steps:
-            cell, value = step
-            sudoku_board.move(cell[0], cell[1], value, True)
-            self.board_entries[cell[0]][cell[1]].configure(border_color="lightgreen",state="normal")
-            self.board_entries[cell[0]][cell[1]].delete(0, 'end')
-            self.board_entries[cell[0]][cell[1]].insert(0, str(value))
-            self.root.update()
-            self.root.after(500)
-            self.board_entries[cell[0]][cell[1]].configure(border_color="black",state="readonly")
-
 if __name__ == "__main__":
     root = ctk.CTk()
     app = SudokuGUI(root)
@@ -1,67 +1,376 @@
-import copy
 import time
+from collections import OrderedDict
+
+from SudokuBoard import SudokuBoard, mask_values
+
+# solve() outcomes
+SOLVED = 'solved'
+UNSATISFIABLE = 'unsatisfiable'
+BUDGET_EXHAUSTED = 'budget_exhausted'
+CANCELLED = 'cancelled'
+
+
+class SearchAborted(Exception):
+    # raised out of the search when a node or time budget runs out or the
+    # cancel event is set; status is BUDGET_EXHAUSTED or CANCELLED
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+def apply_solution(board, solution):
+    # moves every still empty cell to its value in solution, an iterable of
+    # (idx, value); returns the ((row, col), value) steps made, in that order
+    steps = []
+    for idx, value in solution:
+        row, col = divmod(idx, board.size)
+        if board.grid[row][col] == 0:
+            board.move(row, col, value)
+            steps.append(((row, col), value))
+    return steps
+
+
+class NogoodStore:
+    # Bounded LRU store of nogoods: decisions that cannot all hold at once,
+    # each a frozenset of literals (cell index * size + value - 1). Indexed
+    # by literal, so a decision only checks the nogoods that mention it.
+    def __init__(self, capacity=1024, max_length=8):
+        self.capacity = capacity
+        # longer nogoods rarely match again and cost more to check
+        self.max_length = max_length
+        self.entries = OrderedDict()
+        self.by_literal = {}
+        self.hits = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, literals):
+        if not literals or len(literals) > self.max_length or self.capacity <= 0:
+            return
+        nogood = frozenset(literals)
+        if nogood in self.entries:
+            self.entries.move_to_end(nogood)
+            return
+        self.entries[nogood] = None
+        for literal in nogood:
+            self.by_literal.setdefault(literal, set()).add(nogood)
+        if len(self.entries) > self.capacity:
+            evicted, _ = self.entries.popitem(last=False)
+            self.evictions += 1
+            for literal in evicted:
+                watching = self.by_literal[literal]
+                watching.discard(evicted)
+                if not watching:
+                    del self.by_literal[literal]
+
+    def blocking(self, literal, decisions):
+        # a stored nogood that literal would complete, given the literals
+        # already decided, or None
+        for nogood in self.by_literal.get(literal, ()):
+            if all(other == literal or other in decisions for other in nogood):
+                self.entries.move_to_end(nogood)
+                self.hits += 1
+                return nogood
+        return None
 
-from SudokuBoard import SudokuBoard
 
 class SudokuSolver:
-    def __init__(self, board: SudokuBoard):
+    def __init__(self, board: SudokuBoard, time_phases=False, cache=None, backjumping=False,
+                 nogood_capacity=1024):
         self.board = board
         self.steps = []
         self.iterations = 0
+        # candidate values tried and abandoned
+        self.backtracks = 0
+        self.assignments = 0
+        self.max_depth = 0
         self.time = 0
+        self.status = None
+        # limits set per solve() or count_solutions() call, see set_limits
+        self.max_nodes = None
+        self.deadline = None
+        self.cancel_event = None
+        self.limited = False
+        # optional callbacks, each called with (cell, value, depth); on_propagate
+        # also gets whether the move was consistent. None costs one check per node.
+        self.on_assign = None
+        self.on_backtrack = None
+        self.on_propagate = None
+        # seconds per phase, 'propagation' is only measured when time_phases is set
+        self.time_phases = time_phases
+        self.timers = {'fill': board.fill_time, 'search': 0.0, 'propagation': 0.0}
+        # optional SolutionCache consulted before searching and fed after
+        self.cache = cache
+        # with backjumping, solve() runs backjumping_search: the board records
+        # why values leave domains, failures jump back to the deepest decision
+        # involved and are kept as nogoods
+        self.backjumping = backjumping
+        self.nogoods = NogoodStore(nogood_capacity) if backjumping else None
+        # literal -> decision level of the current path, and level -> literal
+        self.decisions = {}
+        self.path = [None]
+        # levels skipped by backjumps, values pruned by a stored nogood
+        self.backjumps = 0
+        self.nogood_prunes = 0
+        if backjumping:
+            board.explain()
+
+    def move(self, cell, value):
+        if not self.time_phases:
+            return self.board.move(cell[0], cell[1], value)
+        start_time = time.perf_counter()
+        consistent = self.board.move(cell[0], cell[1], value)
+        self.timers['propagation'] += time.perf_counter() - start_time
+        return consistent
+
+    def set_limits(self, max_nodes=None, timeout=None, cancel_event=None):
+        self.max_nodes = max_nodes
+        self.deadline = None if timeout is None else time.perf_counter() + timeout
+        self.cancel_event = cancel_event
+        self.limited = max_nodes is not None or timeout is not None or cancel_event is not None
 
-    def backtracking_search(self):
+    def check_limits(self):
+        if self.max_nodes is not None and self.iterations > self.max_nodes:
+            raise SearchAborted(BUDGET_EXHAUSTED)
+        # the clock and the event are only polled every 64 nodes
+        if self.iterations & 63 == 0:
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                raise SearchAborted(BUDGET_EXHAUSTED)
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                raise SearchAborted(CANCELLED)
+
+    def backtracking_search(self, depth=0):
         self.iterations += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self.limited:
+            self.check_limits()
         if self.board.is_complete():
             return True
         cell = self.select_variable()
         for value in self.order_domain_values(cell):
-            original_board = copy.deepcopy(self.board)
-            if self.board.move(cell[0], cell[1], value):
-                if self.backtracking_search():
+            # every change made by move is on the board trail, so undoing to
+            # the mark restores the board without copying it
+            mark = self.board.trail_mark()
+            consistent = self.move(cell, value)
+            if self.on_propagate is not None:
+                self.on_propagate(cell, value, depth, consistent)
+            if consistent:
+                self.assignments += 1
+                if self.on_assign is not None:
+                    self.on_assign(cell, value, depth)
+                if self.backtracking_search(depth + 1):
                     self.steps.append((cell, value))
                     return True
-                self.board = original_board
+                self.board.undo(mark)
+            self.backtracks += 1
+            if self.on_backtrack is not None:
+                self.on_backtrack(cell, value, depth)
         return False
+
+    def backjumping_search(self, depth=0):
+        # conflict-directed backjumping: returns None once solved, otherwise
+        # the decision levels (one bit each) that together rule out this
+        # subtree; a caller whose level is not among them returns at once
+        self.iterations += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self.limited:
+            self.check_limits()
+        board = self.board
+        if board.is_complete():
+            return None
+        cell = self.select_variable()
+        level = depth + 1
+        level_bit = 1 << level
+        size = board.size
+        idx = cell[0] * size + cell[1]
+        # values gone before branching were removed by earlier levels
+        conflict = board.removal_reason(idx)
+        for value in self.order_domain_values(cell):
+            literal = idx * size + value - 1
+            nogood = self.nogoods.blocking(literal, self.decisions)
+            if nogood is not None:
+                self.nogood_prunes += 1
+                for other in nogood:
+                    if other != literal:
+                        conflict |= 1 << self.decisions[other]
+                self.backtracks += 1
+                continue
+            mark = board.trail_mark()
+            board.level = level
+            consistent = self.move(cell, value)
+            if self.on_propagate is not None:
+                self.on_propagate(cell, value, depth, consistent)
+            if consistent:
+                self.assignments += 1
+                if self.on_assign is not None:
+                    self.on_assign(cell, value, depth)
+                self.decisions[literal] = level
+                self.path.append(literal)
+                below = self.backjumping_search(depth + 1)
+                if below is None:
+                    self.steps.append((cell, value))
+                    return None
+                self.path.pop()
+                del self.decisions[literal]
+                board.undo(mark)
+                if not below & level_bit:
+                    # this decision had no part in the failure below, so its
+                    # other values would fail the same way
+                    self.backjumps += 1
+                    return below
+                conflict |= below & ~level_bit
+            else:
+                conflict |= board.conflict & ~level_bit
+            self.backtracks += 1
+            if self.on_backtrack is not None:
+                self.on_backtrack(cell, value, depth)
+        # level 0 is the puzzle itself, the rest name the decisions to avoid
+        self.nogoods.add([self.path[other] for other in range(1, level) if conflict >> other & 1])
+        return conflict
+
+    def counters(self):
+        # snapshot of the search and propagation counters
+        return {
+            'nodes': self.iterations,
+            'assignments': self.assignments,
+            'backtracks': self.backtracks,
+            'max_depth': self.max_depth,
+            'queue_pops': self.board.queue_pops,
+            'wipeouts': self.board.wipeouts,
+            'backjumps': self.backjumps,
+            'nogood_prunes': self.nogood_prunes,
+            'timers': dict(self.timers),
+        }
     
+    def iter_solutions(self):
+        # yields a copy of every solution grid; the board is put back as it
+        # was when the generator is exhausted or closed
+        self.iterations += 1
+        if self.limited:
+            self.check_limits()
+        if self.board.is_complete():
+            yield [row[:] for row in self.board.grid]
+            return
+        cell = self.select_variable()
+        for value in self.order_domain_values(cell):
+            mark = self.board.trail_mark()
+            try:
+                if self.board.move(cell[0], cell[1], value):
+                    yield from self.iter_solutions()
+            finally:
+                self.board.undo(mark)
+
+    def count_solutions(self, limit=None, max_nodes=None, timeout=None, cancel_event=None):
+        # stops searching as soon as limit solutions have been seen; raises
+        # SearchAborted when a limit runs out first
+        self.set_limits(max_nodes, timeout, cancel_event)
+        count = 0
+        solutions = self.iter_solutions()
+        for _ in solutions:
+            count += 1
+            if limit is not None and count >= limit:
+                solutions.close()
+                break
+        return count
+
     def select_variable(self):
-        min_domain = 2 ** 31
-        chosen_cell = None
-        for cell in self.board.domains: ## TODO: change to self.board.find_empty
-            if self.board.grid[cell[0]][cell[1]] == 0 and len(self.board.domains[cell]) < min_domain:
-                min_domain = len(self.board.domains[cell])
-                chosen_cell = cell
-        return chosen_cell
-    
+        return self.board.select_cell()
+
     def order_domain_values(self, cell):
-        values_score = {value: 0 for value in self.board.domains[cell]}
-        for row in range(self.board.size):
-            if row == cell[0]:
-                continue
-            for value in self.board.domains[(row, cell[1])]:
-                if value in values_score:
-                  values_score[value] += 1
-        for col in range(self.board.size):
-            if col == cell[1]:
-                continue
-            for value in self.board.domains[(cell[0], col)]:
-                if value in values_score:
-                  values_score[value] += 1
-        for row in range(cell[0] // 3 * 3, cell[0] // 3 * 3 + 3):
-            for col in range(cell[1] // 3 * 3, cell[1] // 3 * 3 + 3):
-                if row == cell[0] and col == cell[1]:
-                    continue
-                for value in self.board.domains[(row, col)]:
-                    if value in values_score:
-                      values_score[value] += 1
-        return sorted(self.board.domains[cell], key=lambda value: values_score[value])
-
-    def solve(self):
+        idx = cell[0] * self.board.size + cell[1]
+        values = mask_values(self.board.masks[idx])
+        values_score = self.value_scores(idx, values)
+        return sorted(values, key=lambda value: values_score[value])
+
+    def value_scores(self, idx, values):
+        # least-constraining-value score: how many peer domains still hold each
+        # value, summed per unit from the board's support counts, so a peer
+        # sharing two units with the cell counts twice
+        support = self.board.support
+        unit_ids = self.board.topology.cell_unit_ids[idx]
+        return {value: sum(support[unit_id][value - 1] for unit_id in unit_ids) - len(unit_ids)
+                for value in values}
+
+    def iter_steps(self, max_nodes=None, timeout=None, cancel_event=None):
+        # yields ((row, col), value) for every cell the solution fills, once
+        # the search has succeeded: cells already forced by propagation come
+        # first, the rest in search order. Forced values are only certain when
+        # the board has a solution, so nothing is yielded otherwise.
+        size = self.board.size
+        forced = []
+        for idx, mask in enumerate(self.board.masks):
+            row, col = divmod(idx, size)
+            if self.board.grid[row][col] == 0 and not mask & (mask - 1):
+                forced.append(((row, col), mask_values(mask)[0]))
+        if self.solve(max_nodes, timeout, cancel_event)['status'] != SOLVED:
+            return
+        yield from forced
+        forced_cells = {cell for cell, _ in forced}
+        for cell, value in self.steps:
+            if cell not in forced_cells:
+                yield cell, value
+
+    def solve_from_cache(self, puzzle):
+        # True when the cache settled the puzzle, known unsolvable ones included
+        entry = self.cache.lookup(puzzle)
+        if entry is None:
+            return False
+        solution, count = entry
+        if solution is None:
+            return count == 0
+        mark = self.board.trail_mark()
+        size = self.board.size
+        # appended deepest first, like the search does, solve reverses them
+        for idx in reversed(range(size * size)):
+            row, col = divmod(idx, size)
+            if puzzle[row][col] == 0:
+                if not self.move((row, col), solution[row][col]):
+                    self.board.undo(mark)
+                    self.steps = []
+                    return False
+                self.steps.append(((row, col), solution[row][col]))
+        return True
+
+    def outcome(self):
+        return {'status': self.status, 'time': self.time, **self.counters()}
+
+    def solve(self, max_nodes=None, timeout=None, cancel_event=None):
+        """Searches for a solution within the given limits.
+
+        Returns the outcome dict: status is SOLVED, UNSATISFIABLE,
+        BUDGET_EXHAUSTED or CANCELLED, next to the counters reached so far.
+        An aborted search leaves the board as it found it.
+        """
         start_time = time.time()
-        self.backtracking_search()
+        search_start = time.perf_counter()
+        self.set_limits(max_nodes, timeout, cancel_event)
+        mark = self.board.trail_mark()
+        puzzle = [row[:] for row in self.board.grid] if self.cache is not None else None
+        try:
+            if puzzle is None or not self.solve_from_cache(puzzle):
+                if self.backjumping:
+                    self.decisions = {}
+                    self.path = [None]
+                    self.backjumping_search()
+                else:
+                    self.backtracking_search()
+                if puzzle is not None:
+                    self.cache.store(puzzle, self.board.grid if self.board.is_complete() else None,
+                                     None if self.board.is_complete() else 0)
+            self.status = SOLVED if self.board.is_complete() else UNSATISFIABLE
+        except SearchAborted as aborted:
+            self.board.undo(mark)
+            self.steps = []
+            self.status = aborted.status
+        self.timers['search'] = time.perf_counter() - search_start
         end_time = time.time()
         self.time = end_time - start_time
-        return self.steps.reverse()
+        self.steps.reverse()
+        return self.outcome()
     
 if __name__ == "__main__":
     board = SudokuBoard()
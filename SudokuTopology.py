@@ -0,0 +1,49 @@
+import math
+from functools import lru_cache
+
+
+class SudokuTopology:
+    # Flat index tables for an NxN board, cells are numbered row * size + col.
+    def __init__(self, size=9):
+        box_size = math.isqrt(size)
+        if box_size * box_size != size:
+            raise ValueError(f"Board size must be a perfect square, got {size}")
+        self.size = size
+        self.box_size = box_size
+        self.cell_count = size * size
+
+        self.row_of = tuple(idx // size for idx in range(self.cell_count))
+        self.col_of = tuple(idx % size for idx in range(self.cell_count))
+        self.box_of = tuple((row // box_size) * box_size + col // box_size
+                            for row, col in zip(self.row_of, self.col_of))
+        # top-left cell of the box containing each cell
+        self.box_origin = tuple(((row // box_size) * box_size, (col // box_size) * box_size)
+                                for row, col in zip(self.row_of, self.col_of))
+
+        self.rows = tuple(tuple(row * size + col for col in range(size)) for row in range(size))
+        self.cols = tuple(tuple(row * size + col for row in range(size)) for col in range(size))
+        self.boxes = tuple(
+            tuple((box_row + i) * size + box_col + j for i in range(box_size) for j in range(box_size))
+            for box_row in range(0, size, box_size) for box_col in range(0, size, box_size)
+        )
+        self.units = self.rows + self.cols + self.boxes
+
+        # row, column and box of every cell, in that order
+        self.cell_units = tuple(
+            (self.rows[self.row_of[idx]], self.cols[self.col_of[idx]], self.boxes[self.box_of[idx]])
+            for idx in range(self.cell_count)
+        )
+        # indices into units of the row, column and box of every cell
+        self.cell_unit_ids = tuple(
+            (self.row_of[idx], size + self.col_of[idx], 2 * size + self.box_of[idx])
+            for idx in range(self.cell_count)
+        )
+        self.peers = tuple(
+            tuple(sorted({peer for unit in self.cell_units[idx] for peer in unit} - {idx}))
+            for idx in range(self.cell_count)
+        )
+
+
+@lru_cache(maxsize=None)
+def get_topology(size=9):
+    return SudokuTopology(size)
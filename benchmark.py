@@ -0,0 +1,232 @@
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from itertools import islice
+
+from SudokuBoard import SudokuBoard
+from sudoku_engines import ENGINES, get_solver
+from sudoku_io import format_cells, format_grid, parse_cells, read_cells
+from sudoku_puzzles import HARD_PUZZLES
+from sudoku_utils import SudokuUtils
+
+DIFFICULTIES = {'Easy': 60, 'Medium': 45, 'Hard': 30}
+METRICS = ('fill_time', 'solve_time', 'nodes', 'backtracks', 'peak_memory')
+# metrics checked by --compare, each against the relative threshold
+COMPARED_METRICS = ('fill_time', 'solve_time', 'nodes', 'backtracks')
+# cold-start budgets in milliseconds for the headless modules (cumulative
+# -X importtime of the module, best of several fresh interpreters)
+IMPORT_BUDGETS = {
+    'SudokuBoard': 30,
+    'SudokuSolver': 30,
+    'sudoku_engines': 40,
+    'sudoku_utils': 40,
+    'sudoku_cache': 50,
+    'sudoku_batch': 60,
+    'sudoku_io': 30,
+    'PuzzleBank': 60,
+    'sudoku_rating': 70,
+}
+# modules a headless import must not pull in
+HEADLESS_FORBIDDEN = ('numpy', 'customtkinter', 'tkinter', 'multiprocessing')
+
+
+def build_corpus(per_difficulty=10, seed=2024):
+    # the same seed always yields the same puzzles for a given generator
+    corpus = {}
+    for offset, (difficulty, filled_cells) in enumerate(DIFFICULTIES.items()):
+        random.seed(seed + offset)
+        corpus[difficulty] = [format_grid(SudokuUtils.generate_sudoku(filled_cells))
+                              for _ in range(per_difficulty)]
+    corpus['Known hard'] = [line.replace('.', '0') for line in HARD_PUZZLES.values()]
+    return corpus
+
+
+def load_corpus(path, per_difficulty=10, seed=2024, limit=None):
+    # generated once and stored, so later runs and baselines see the same
+    # puzzles; any other file is read with sudoku_io as a single corpus
+    if not path.endswith('.json'):
+        puzzles = read_cells(path)
+        return {os.path.basename(path): [format_cells(cells) for cells in islice(puzzles, limit)]}
+    if os.path.exists(path):
+        with open(path) as corpus_file:
+            return json.load(corpus_file)
+    corpus = build_corpus(per_difficulty, seed)
+    with open(path, 'w') as corpus_file:
+        json.dump(corpus, corpus_file, indent=2)
+    return corpus
+
+
+def run_once(engine, cells):
+    solver_class = get_solver(engine)
+    start_time = time.perf_counter()
+    sudoku_board = SudokuBoard(math.isqrt(len(cells)))
+    sudoku_board.fill_cells(cells)
+    fill_time = time.perf_counter() - start_time
+
+    solver = solver_class(sudoku_board)
+    start_time = time.perf_counter()
+    solver.solve()
+    solve_time = time.perf_counter() - start_time
+    if not sudoku_board.is_complete():
+        raise RuntimeError(f"{engine} did not solve {format_cells(cells)}")
+    return fill_time, solve_time, solver.iterations, solver.backtracks
+
+
+def peak_memory(engine, cells):
+    # measured in its own run, tracemalloc would distort the timings
+    tracemalloc.start()
+    try:
+        run_once(engine, cells)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def summarize(values):
+    ordered = sorted(values)
+    p95_index = max(0, math.ceil(0.95 * len(ordered)) - 1)
+    return {
+        'median': statistics.median(ordered),
+        'p95': ordered[p95_index],
+        'max': ordered[-1],
+    }
+
+
+def run_suite(corpus, engines, repeats=5, warmup=1):
+    results = {}
+    for engine in engines:
+        results[engine] = {}
+        for corpus_name, lines in corpus.items():
+            puzzles = [parse_cells(line) for line in lines]
+            for _ in range(warmup):
+                for puzzle in puzzles:
+                    run_once(engine, puzzle)
+
+            samples = {metric: [] for metric in METRICS}
+            for puzzle in puzzles:
+                runs = [run_once(engine, puzzle) for _ in range(repeats)]
+                # per-puzzle medians over the repeats, so one noisy run does not skew p95
+                samples['fill_time'].append(statistics.median(run[0] for run in runs))
+                samples['solve_time'].append(statistics.median(run[1] for run in runs))
+                samples['nodes'].append(runs[0][2])
+                samples['backtracks'].append(runs[0][3])
+                samples['peak_memory'].append(peak_memory(engine, puzzle))
+
+            results[engine][corpus_name] = {metric: summarize(values) for metric, values in samples.items()}
+            solve_time = results[engine][corpus_name]['solve_time']
+            print(f"[{engine}] {corpus_name}: median {solve_time['median'] * 1000:.3f} ms, "
+                  f"p95 {solve_time['p95'] * 1000:.3f} ms, "
+                  f"nodes {results[engine][corpus_name]['nodes']['median']}", file=sys.stderr)
+    return results
+
+
+def compare(baseline, current, threshold=0.20):
+    # flags every metric statistic that grew by more than threshold
+    regressions = []
+    for engine, corpora in current['results'].items():
+        for corpus_name, metrics in corpora.items():
+            old_metrics = baseline['results'].get(engine, {}).get(corpus_name)
+            if old_metrics is None:
+                continue
+            for metric in COMPARED_METRICS:
+                for statistic in ('median', 'p95'):
+                    old = old_metrics[metric][statistic]
+                    new = metrics[metric][statistic]
+                    if new > old * (1 + threshold) and new - old > 1e-9:
+                        regressions.append((engine, corpus_name, metric, statistic, old, new))
+    return regressions
+
+
+def import_profile(module, repeats=5):
+    """Best cumulative import time of module in seconds over repeats fresh
+    interpreters, and the forbidden modules that import loaded."""
+    code = (f"import sys, {module}; "
+            f"print(' '.join(name for name in {HEADLESS_FORBIDDEN!r} if name in sys.modules))")
+    best = None
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True,
+                                text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        for line in result.stderr.splitlines():
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == module and not fields[2].startswith('  '):
+                cumulative = int(fields[1]) / 1e6
+                best = cumulative if best is None else min(best, cumulative)
+        loaded = result.stdout.split()
+    return best, loaded
+
+
+def check_imports(budgets=IMPORT_BUDGETS, repeats=5):
+    # returns the modules over budget or importing something heavy
+    failures = []
+    for module, budget in budgets.items():
+        seconds, loaded = import_profile(module, repeats)
+        over = seconds * 1000 > budget
+        print(f"{module}: {seconds * 1000:.1f} ms (budget {budget} ms)"
+              + (f", loads {', '.join(loaded)}" if loaded else ""), file=sys.stderr)
+        if over or loaded:
+            failures.append((module, seconds, loaded))
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproducible solver benchmarks.")
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help="where to write the results")
+    parser.add_argument('--corpus', default='benchmark_corpus.json',
+                        help="puzzle corpus, generated on first use; other files are read as puzzle files")
+    parser.add_argument('--limit', type=int, default=None, help="puzzles taken from a puzzle file corpus")
+    parser.add_argument('--engines', nargs='+', choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument('--per-difficulty', type=int, default=10, help="generated puzzles per difficulty")
+    parser.add_argument('--seed', type=int, default=2024, help="seed used to generate the corpus")
+    parser.add_argument('--repeats', type=int, default=5, help="timed runs per puzzle")
+    parser.add_argument('--warmup', type=int, default=1, help="untimed passes over each corpus")
+    parser.add_argument('--compare', metavar='BASELINE', help="results file to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.20, help="allowed relative growth before flagging")
+    parser.add_argument('--imports', action='store_true', help="only check the headless import budgets")
+    args = parser.parse_args(argv)
+
+    if args.imports:
+        failures = check_imports(repeats=args.repeats)
+        for module, seconds, loaded in failures:
+            print(f"IMPORT BUDGET [{module}] {seconds * 1000:.1f} ms, loads: {', '.join(loaded) or 'nothing heavy'}")
+        if failures:
+            return 1
+        print("All imports within budget")
+        return 0
+
+    corpus = load_corpus(args.corpus, args.per_difficulty, args.seed, args.limit)
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'corpus': args.corpus,
+            'repeats': args.repeats,
+            'warmup': args.warmup,
+        },
+        'results': run_suite(corpus, args.engines, args.repeats, args.warmup),
+    }
+    with open(args.output, 'w') as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(baseline, results, args.threshold)
+        for engine, corpus_name, metric, statistic, old, new in regressions:
+            print(f"REGRESSION [{engine}] {corpus_name} {metric} {statistic}: {old:.6g} -> {new:.6g}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,30 @@
-import customtkinter as ctk
-from SudokuGUI import SudokuGUI
+import importlib
+import sys
+
+# headless commands and the module whose main() runs them; the GUI and
+# customtkinter are only imported when no command is given
+COMMANDS = {
+    'solve': 'sudoku_batch',
+    'bank': 'PuzzleBank',
+    'rate': 'sudoku_rating',
+    'convert': 'sudoku_io',
+    'benchmark': 'benchmark',
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        return importlib.import_module(COMMANDS[argv[0]]).main(argv[1:])
+
+    import customtkinter as ctk
+    from SudokuGUI import SudokuGUI
 
-if __name__ == "__main__":
     root = ctk.CTk()
     app = SudokuGUI(root)
     root.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
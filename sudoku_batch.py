@@ -0,0 +1,139 @@
+import argparse
+import math
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+
+from SudokuBoard import SudokuBoard
+from SudokuSolver import UNSATISFIABLE
+from sudoku_engines import ENGINES, get_solver
+from sudoku_io import FORMATS, PuzzleWriter, flatten, read_cells
+
+
+def solve_puzzle(puzzle, engine='backtracking', max_nodes=None, timeout=None):
+    # puzzle is a grid or flat row-major cells, as sudoku_io reads them
+    start_time = time.perf_counter()
+    cells = flatten(puzzle)
+    size = math.isqrt(len(cells))
+    board = SudokuBoard(size)
+    board.fill_cells(cells)
+    solver = get_solver(engine)(board)
+    # a clue rejected by fill means the puzzle contradicts itself
+    clues_kept = all(board.grid[idx // size][idx % size] == value for idx, value in enumerate(cells) if value)
+    status = solver.solve(max_nodes, timeout)['status'] if clues_kept else UNSATISFIABLE
+    solved = clues_kept and board.is_complete()
+    return {
+        'solution': [row[:] for row in board.grid] if solved else None,
+        'solved': solved,
+        'status': status,
+        'iterations': solver.iterations,
+        'time': time.perf_counter() - start_time,
+    }
+
+
+def _solve_chunk(chunk, engine='backtracking', max_nodes=None, timeout=None):
+    results = []
+    for index, puzzle in chunk:
+        result = solve_puzzle(puzzle, engine, max_nodes, timeout)
+        result['index'] = index
+        results.append(result)
+    return results
+
+
+def _chunks(puzzles, chunksize):
+    numbered = enumerate(puzzles)
+    while True:
+        chunk = list(islice(numbered, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def solve_batch(puzzles, workers=None, chunksize=32, ordered=True, engine='backtracking',
+                max_nodes=None, timeout=None):
+    """Solves an iterable of puzzles across a process pool.
+
+    Yields one result dict per puzzle with index, solution, solved, status,
+    iterations and time. Results come back in input order when ordered is
+    True, otherwise as soon as their chunk completes. Only a bounded number
+    of chunks is in flight, so the input can be a lazy stream. max_nodes
+    and timeout bound every single puzzle, so one pathological input cannot
+    stall a worker.
+    """
+    workers = workers or os.cpu_count() or 1
+    # fail on an unknown engine name before any worker starts
+    get_solver(engine)
+    chunks = _chunks(puzzles, chunksize)
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from _solve_chunk(chunk, engine, max_nodes, timeout)
+        return
+
+    # multiprocessing is a large import, single-worker runs never need it
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    max_in_flight = workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque(executor.submit(_solve_chunk, chunk, engine, max_nodes, timeout)
+                        for chunk in islice(chunks, max_in_flight))
+        if ordered:
+            while pending:
+                results = pending.popleft().result()
+                for chunk in islice(chunks, 1):
+                    pending.append(executor.submit(_solve_chunk, chunk, engine, max_nodes, timeout))
+                yield from results
+        else:
+            pending = set(pending)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for chunk in islice(chunks, len(done)):
+                    pending.add(executor.submit(_solve_chunk, chunk, engine, max_nodes, timeout))
+                for future in done:
+                    yield from future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve Sudoku puzzles in bulk from line, sdk or jsonl files.")
+    parser.add_argument('input', nargs='?', default='-', help="puzzle file, '-' for stdin, may be compressed")
+    parser.add_argument('-o', '--output', default='-', help="solution file, '-' for stdout")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('-c', '--chunksize', type=int, default=32, help="puzzles sent to a worker at a time")
+    parser.add_argument('-e', '--engine', choices=list(ENGINES), default='backtracking', help="solver engine")
+    parser.add_argument('--max-nodes', type=int, default=None, help="search nodes allowed per puzzle")
+    parser.add_argument('--timeout', type=float, default=None, help="seconds allowed per puzzle")
+    parser.add_argument('--input-format', choices=FORMATS, default=None, help="default: from the file name")
+    parser.add_argument('--output-format', choices=FORMATS, default=None, help="default: from the file name")
+    args = parser.parse_args(argv)
+
+    puzzles = deque()
+
+    def remember(stream):
+        # unsolved puzzles are written back unchanged, so keep them until their
+        # result arrives; bytes, since memoryviews do not pickle
+        for cells in stream:
+            puzzle = bytes(cells)
+            puzzles.append(puzzle)
+            yield puzzle
+
+    start_time = time.perf_counter()
+    count = solved = 0
+    with PuzzleWriter(args.output, args.output_format) as sink:
+        for result in solve_batch(remember(read_cells(args.input, args.input_format)), args.workers,
+                                  args.chunksize, engine=args.engine, max_nodes=args.max_nodes,
+                                  timeout=args.timeout):
+            puzzle = puzzles.popleft()
+            count += 1
+            solved += result['solved']
+            sink.write(result['solution'] if result['solved'] else puzzle)
+
+    elapsed = time.perf_counter() - start_time
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"Solved {solved}/{count} puzzles in {elapsed:.3f} seconds ({rate:.1f} puzzles/sec).", file=sys.stderr)
+    return 0 if solved == count else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+from itertools import islice, permutations, product
+
+from SudokuTopology import get_topology
+
+# one character per value, so keys stay short up to 25x25
+SYMBOLS = "0123456789ABCDEFGHIJKLMNOP"
+
+
+def _tied_orders(keys, groups):
+    """Every order of groups that sorts them by key.
+
+    groups is a list of index lists, keys holds one key per group. Groups
+    with equal keys cannot be told apart by the invariants, so each order
+    of a tie group is yielded.
+    """
+    ordered = sorted(range(len(groups)), key=lambda group: keys[group])
+    ties = []
+    for group in ordered:
+        if ties and keys[ties[-1][0]] == keys[group]:
+            ties[-1].append(group)
+        else:
+            ties.append([group])
+    for choice in product(*(permutations(tie) for tie in ties)):
+        yield [groups[group] for tie in choice for group in tie]
+
+
+def _line_orders(cells, size, box_size):
+    """Candidate row orders for a flat grid, as lists of row indices.
+
+    Rows are ranked by their clue count and by the clue counts of the
+    columns their clues sit in, bands by the ranks of their rows. Both
+    are unchanged by relabeling and by any row or column permutation, so
+    equivalent puzzles get matching candidate sets.
+    """
+    col_counts = [sum(1 for row in range(size) if cells[row * size + col]) for col in range(size)]
+    row_keys = [sorted(col_counts[col] for col in range(size) if cells[row * size + col]) for row in range(size)]
+    row_keys = [(len(key), key) for key in row_keys]
+    bands = [list(range(band * box_size, (band + 1) * box_size)) for band in range(box_size)]
+    band_keys = [sorted(row_keys[row] for row in band) for band in bands]
+    # rows can only move inside their band, so each band is ordered on its own
+    inner = [list(_tied_orders([row_keys[row] for row in band], [[row] for row in band])) for band in bands]
+    for band_order in _tied_orders(band_keys, [[band] for band in range(box_size)]):
+        for rows in product(*(inner[band[0]] for band in band_order)):
+            yield [row[0] for band in rows for row in band]
+
+
+def canonical_form(grid, max_candidates=256):
+    """Canonical key of a grid under the Sudoku symmetry group.
+
+    Returns (key, source, labels): key is the canonical grid as a string,
+    source[k] is the flat index of the original cell that lands on
+    canonical cell k and labels maps every original value to its
+    canonical one. Row and column orders are narrowed with invariants and
+    only ties are tried, both transposes included; each candidate is
+    relabeled by first appearance and the smallest one wins. Past
+    max_candidates orders per transpose the search is cut short, which can
+    only cost hits: the key is always an exact transform of the grid.
+    """
+    size = len(grid)
+    box_size = get_topology(size).box_size
+    cells = [value for row in grid for value in row]
+    transposed = [grid[row][col] for col in range(size) for row in range(size)]
+    best = None
+    for flipped, lines in ((False, cells), (True, transposed)):
+        columns = [lines[row * size + col] for col in range(size) for row in range(size)]
+        row_orders = list(islice(_line_orders(lines, size, box_size), max_candidates))
+        col_orders = list(islice(_line_orders(columns, size, box_size), max_candidates))
+        orders = product(row_orders, col_orders)
+        for rows, cols in islice(orders, max_candidates):
+            if flipped:
+                source = [col * size + row for row in rows for col in cols]
+            else:
+                source = [row * size + col for row in rows for col in cols]
+            labels = {}
+            key = []
+            for idx in source:
+                value = cells[idx]
+                if value and value not in labels:
+                    labels[value] = len(labels) + 1
+                key.append(labels[value] if value else 0)
+            if best is None or key < best[0]:
+                best = (key, source, labels)
+    key, source, labels = best
+    # values missing from the grid take the remaining labels in order
+    for value in range(1, size + 1):
+        if value not in labels:
+            labels[value] = len(labels) + 1
+    return ''.join(SYMBOLS[value] for value in key), source, labels
+
+
+class SolutionCache:
+    # Solutions keyed by canonical form, so relabeled, permuted or transposed
+    # copies of a puzzle share one entry. Entries are (solution, count):
+    # count is the number of solutions up to two, None when only one
+    # solution was looked for. A bounded LRU sits in memory; with a path the
+    # entries are also kept in sqlite and survive between runs.
+    def __init__(self, capacity=1024, path=None, max_candidates=256):
+        self.capacity = capacity
+        self.max_candidates = max_candidates
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS solutions "
+                            "(key TEXT PRIMARY KEY, solution TEXT, count INTEGER)")
+            self.db.commit()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries), 'capacity': self.capacity}
+
+    def warm(self, limit=None):
+        # fills the LRU from the persistent store, up to capacity
+        if self.db is None:
+            return 0
+        limit = self.capacity if limit is None else min(limit, self.capacity)
+        with self.lock:
+            rows = self.db.execute("SELECT key, solution, count FROM solutions LIMIT ?", (limit,)).fetchall()
+            for key, solution, count in rows:
+                self.remember(key, (solution, count))
+        return len(rows)
+
+    def remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def lookup(self, grid):
+        """(solution, count) for grid, or None on a miss.
+
+        The solution comes back as a grid mapped onto the puzzle as given,
+        or None when the puzzle is known to have none.
+        """
+        key, source, labels = canonical_form(grid, self.max_candidates)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None and self.db is not None:
+                entry = self.db.execute("SELECT solution, count FROM solutions WHERE key = ?", (key,)).fetchone()
+            if entry is not None:
+                self.remember(key, entry)
+            else:
+                self.misses += 1
+                return None
+            self.hits += 1
+        solution, count = entry
+        if solution is None:
+            return None, count
+        size = len(grid)
+        values = {label: value for value, label in labels.items()}
+        flat = [0] * (size * size)
+        for position, idx in enumerate(source):
+            flat[idx] = values[SYMBOLS.index(solution[position])]
+        return [flat[row * size:(row + 1) * size] for row in range(size)], count
+
+    def store(self, grid, solution, count=None):
+        # solution None with count 0 records an unsolvable puzzle; a known
+        # count is never replaced by an unknown one
+        key, source, labels = canonical_form(grid, self.max_candidates)
+        if solution is not None:
+            flat = [value for row in solution for value in row]
+            solution = ''.join(SYMBOLS[labels[flat[idx]]] for idx in source)
+        with self.lock:
+            old = self.entries.get(key)
+            if count is None and old is not None:
+                count = old[1]
+            self.remember(key, (solution, count))
+            if self.db is not None:
+                self.db.execute("INSERT INTO solutions (key, solution, count) VALUES (?, ?, ?) "
+                                "ON CONFLICT(key) DO UPDATE SET solution = excluded.solution, "
+                                "count = COALESCE(excluded.count, solutions.count)", (key, solution, count))
+                self.db.commit()
+        return key
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,19 @@
+from functools import partial
+
+from DLXSolver import DLXSolver
+from SudokuSolver import SudokuSolver
+
+# every engine takes a filled SudokuBoard and exposes solve(), steps,
+# iterations and time
+ENGINES = {
+    'backtracking': SudokuSolver,
+    'dlx': DLXSolver,
+    'backjumping': partial(SudokuSolver, backjumping=True),
+}
+
+
+def get_solver(name):
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown solver engine {name!r}, expected one of {', '.join(ENGINES)}") from None
@@ -0,0 +1,291 @@
+import importlib
+import io
+import json
+import math
+import os
+import sys
+
+# Streaming readers and writers for puzzle files. Puzzles are handed out as
+# flat cell sequences, row-major with 0 for blanks: memoryview slices of one
+# translated chunk of the file, so no per-puzzle lists are built and
+# SudokuBoard.fill_cells takes them as they are. The slices stay valid after
+# the reader moves on; bytes(cells) gives a picklable copy for worker pools.
+#
+# formats:
+#   line   one puzzle per line, '0' or '.' for blanks, '#' starts a comment
+#   sdk    one grid row per line, '|', '-', '+' and spaces as decoration,
+#          puzzles follow one another, '#' starts a comment
+#   jsonl  one JSON object per line, 'puzzle' holding a line-format string
+#          or a list of rows; writers add any extra fields given
+
+FORMATS = ('line', 'sdk', 'jsonl')
+# file suffix -> format, looked at once the compression suffix is stripped
+FORMAT_SUFFIXES = {'.sdk': 'sdk', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+# compression name -> (module, function) opening a binary stream like open(path, mode)
+COMPRESSIONS = {
+    'gzip': ('gzip', 'open'),
+    'bz2': ('bz2', 'open'),
+    'lzma': ('lzma', 'open'),
+}
+COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'lzma', '.lzma': 'lzma'}
+CHUNK_SIZE = 1 << 20
+
+# byte -> cell value: digits, then letters from 10 on for boards past 9x9;
+# INVALID marks every other byte
+SYMBOLS = b'123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+INVALID = 255
+_cell_table = bytearray([INVALID]) * 256
+_cell_table[ord('0')] = _cell_table[ord('.')] = 0
+for _value, _symbol in enumerate(SYMBOLS, 1):
+    _cell_table[_symbol] = _cell_table[ord(chr(_symbol).lower())] = _value
+CELL_TABLE = bytes(_cell_table)
+# decoration dropped from sdk rows before translating
+SDK_DECORATION = b' \t\r|-+'
+BLANKS = b' \t\r'
+
+
+def register_compression(name, opener, *suffixes):
+    # opener(path, mode) returns a binary file object; suffixes pick it by file name
+    COMPRESSIONS[name] = opener
+    for suffix in suffixes:
+        COMPRESSION_SUFFIXES[suffix] = name
+
+
+def detect(path, format=None, compression=None):
+    # (format, compression) from the file name where not given
+    name = os.path.basename(path).lower()
+    root, suffix = os.path.splitext(name)
+    if compression is None and suffix in COMPRESSION_SUFFIXES:
+        compression = COMPRESSION_SUFFIXES[suffix]
+        name = root
+    if format is None:
+        format = FORMAT_SUFFIXES.get(os.path.splitext(name)[1], 'line')
+    if format not in FORMATS:
+        raise ValueError(f"Unknown puzzle format {format!r}, expected one of {', '.join(FORMATS)}")
+    return format, compression
+
+
+def open_stream(path, mode='rb', compression=None):
+    # binary stream for path, '-' is stdin or stdout
+    if path == '-':
+        stream = sys.stdin if 'r' in mode else sys.stdout
+        return stream.buffer
+    if compression is None:
+        return open(path, mode)
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression {compression!r}, expected one of {', '.join(COMPRESSIONS)}")
+    opener = COMPRESSIONS[compression]
+    if isinstance(opener, tuple):
+        # the codec modules are only imported when a file needs them
+        module, function = opener
+        opener = getattr(importlib.import_module(module), function)
+    return opener(path, mode)
+
+
+def parse_cells(text):
+    # cells of one line-format puzzle given as str or bytes
+    data = text.encode('ascii') if isinstance(text, str) else bytes(text)
+    cells = data.strip(BLANKS + b'\n').translate(CELL_TABLE)
+    size = math.isqrt(len(cells))
+    if size * size != len(cells):
+        raise ValueError(f"Puzzle line has {len(cells)} cells, expected a square number")
+    if INVALID in cells:
+        raise ValueError(f"Puzzle line {data!r} holds characters other than digits, letters and '.'")
+    return memoryview(cells)
+
+
+def format_cells(cells):
+    # line format, '0' for blanks
+    return ''.join(chr(SYMBOLS[value - 1]) if value else '0' for value in cells)
+
+
+def parse_puzzle(text):
+    # one line-format puzzle as a grid of rows
+    cells = parse_cells(text)
+    size = math.isqrt(len(cells))
+    return [list(cells[row * size:(row + 1) * size]) for row in range(size)]
+
+
+def format_grid(grid):
+    return format_cells(flatten(grid))
+
+
+def flatten(puzzle):
+    # flat cells of a grid of rows, flat sequences are passed through
+    if len(puzzle) and not isinstance(puzzle[0], int) and hasattr(puzzle[0], '__len__'):
+        return [int(value) for row in puzzle for value in row]
+    return puzzle
+
+
+def _lines(stream, chunk_size):
+    # (chunk, end) with complete lines up to end, reading chunk_size bytes at
+    # a time; only the unfinished last line is carried over to the next chunk
+    tail = b''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        chunk = tail + chunk if tail else chunk
+        end = chunk.rfind(b'\n') + 1
+        tail = chunk[end:]
+        if end:
+            yield chunk, end
+    if tail:
+        yield tail, len(tail)
+
+
+def _read_line_format(stream, chunk_size):
+    number = 0
+    for chunk, end in _lines(stream, chunk_size):
+        # one C-level pass translates the whole chunk, lines become slices of it
+        translated = chunk.translate(CELL_TABLE)
+        values = memoryview(translated)
+        start = 0
+        while start < end:
+            stop = chunk.find(b'\n', start, end)
+            stop = end if stop < 0 else stop
+            line_start, line_stop, start = start, stop, stop + 1
+            number += 1
+            while line_start < line_stop and chunk[line_start] in BLANKS:
+                line_start += 1
+            while line_stop > line_start and chunk[line_stop - 1] in BLANKS:
+                line_stop -= 1
+            if line_start == line_stop or chunk[line_start] == ord('#'):
+                continue
+            cells = values[line_start:line_stop]
+            size = math.isqrt(len(cells))
+            if size * size != len(cells) or translated.find(INVALID, line_start, line_stop) >= 0:
+                raise ValueError(f"Line {number} is not a puzzle: {chunk[line_start:line_stop][:100]!r}")
+            yield cells
+
+
+def _read_sdk_format(stream, chunk_size):
+    cells = bytearray()
+    size = None
+    number = 0
+    for chunk, end in _lines(stream, chunk_size):
+        for line in chunk[:end].splitlines():
+            number += 1
+            if line.startswith(b'#'):
+                continue
+            row = line.translate(CELL_TABLE, SDK_DECORATION)
+            if not row:
+                continue
+            if INVALID in row or (size is not None and len(row) != size):
+                raise ValueError(f"Line {number} is not an sdk grid row: {line[:100]!r}")
+            size = len(row)
+            cells += row
+            if len(cells) == size * size:
+                yield memoryview(bytes(cells))
+                cells.clear()
+                size = None
+    if cells:
+        raise ValueError("Incomplete sdk grid at the end of the file")
+
+
+def _read_jsonl_format(stream, chunk_size):
+    for chunk, end in _lines(stream, chunk_size):
+        for line in chunk[:end].splitlines():
+            if not line.strip():
+                continue
+            puzzle = json.loads(line)['puzzle']
+            if isinstance(puzzle, str):
+                yield parse_cells(puzzle)
+            else:
+                yield memoryview(bytes(flatten(puzzle)))
+
+
+_READERS = {'line': _read_line_format, 'sdk': _read_sdk_format, 'jsonl': _read_jsonl_format}
+
+
+def read_cells(path, format=None, compression=None, chunk_size=CHUNK_SIZE):
+    """Streams the puzzles of a file as flat cell memoryviews.
+
+    format and compression are taken from the file name unless given ('-'
+    reads stdin, line format unless told otherwise). Memory stays bounded
+    by chunk_size whatever the file size.
+    """
+    format, compression = detect(path, format, compression)
+    stream = open_stream(path, 'rb', compression)
+    try:
+        yield from _READERS[format](stream, chunk_size)
+    finally:
+        if path != '-':
+            stream.close()
+
+
+def read_boards(path, propagation='basic', **options):
+    # a filled SudokuBoard per puzzle, see read_cells for the options
+    from SudokuBoard import SudokuBoard
+
+    for cells in read_cells(path, **options):
+        board = SudokuBoard(math.isqrt(len(cells)), propagation)
+        board.fill_cells(cells)
+        yield board
+
+
+class PuzzleWriter:
+    # Writes puzzles, given as flat cells or grids, in any of FORMATS.
+    # Output is buffered and goes through the compression picked by name.
+    def __init__(self, path, format=None, compression=None):
+        self.path = path
+        self.format, compression = detect(path, format, compression)
+        self.stream = io.TextIOWrapper(open_stream(path, 'wb', compression), encoding='ascii', newline='\n')
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, puzzle, **fields):
+        # fields are only kept by the jsonl format
+        cells = flatten(puzzle)
+        line = format_cells(cells)
+        if self.format == 'line':
+            self.stream.write(line + '\n')
+        elif self.format == 'sdk':
+            size = math.isqrt(len(line))
+            self.stream.write(''.join(line[row * size:(row + 1) * size].replace('0', '.') + '\n'
+                                      for row in range(size)) + '\n')
+        else:
+            self.stream.write(json.dumps({'puzzle': line, **fields}) + '\n')
+        self.count += 1
+
+    def close(self):
+        if self.stream.closed:
+            return
+        if self.path == '-':
+            # leave stdout open for whoever writes after us
+            self.stream.flush()
+            self.stream.detach()
+        else:
+            self.stream.close()
+
+
+def write_puzzles(path, puzzles, format=None, compression=None):
+    # writes an iterable of puzzles, returns how many
+    with PuzzleWriter(path, format, compression) as writer:
+        for puzzle in puzzles:
+            writer.write(puzzle)
+        return writer.count
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert puzzle files between formats and compressions.")
+    parser.add_argument('input', help="puzzle file, '-' for stdin")
+    parser.add_argument('output', help="puzzle file, '-' for stdout")
+    parser.add_argument('--from', dest='input_format', choices=FORMATS, default=None)
+    parser.add_argument('--to', dest='output_format', choices=FORMATS, default=None)
+    args = parser.parse_args(argv)
+
+    count = write_puzzles(args.output, read_cells(args.input, args.input_format), args.output_format)
+    print(f"{count} puzzles written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from SudokuBoard import SudokuBoard
+from SudokuSolver import BUDGET_EXHAUSTED, CANCELLED, SOLVED, UNSATISFIABLE, SearchAborted, SudokuSolver, apply_solution
+import sudoku_workers
+from sudoku_io import parse_puzzle
+from sudoku_puzzles import HARD_PUZZLES
+from sudoku_utils import SudokuUtils
+
+def _solve_subproblem(grid, rules, max_nodes, timeout):
+    sudoku_board = SudokuBoard(len(grid), rules)
+    if not sudoku_board.fill(grid):
+        return UNSATISFIABLE, None, 0
+    outcome = SudokuSolver(sudoku_board).solve(max_nodes, timeout, sudoku_workers.stop_event)
+    return outcome['status'], sudoku_board.grid if outcome['status'] == SOLVED else None, outcome['nodes']
+
+
+def _count_subproblem(grid, rules, limit, max_nodes, timeout):
+    sudoku_board = SudokuBoard(len(grid), rules)
+    if not sudoku_board.fill(grid):
+        return UNSATISFIABLE, 0, 0
+    solver = SudokuSolver(sudoku_board)
+    try:
+        count = solver.count_solutions(limit, max_nodes, timeout, sudoku_workers.stop_event)
+    except SearchAborted as aborted:
+        return aborted.status, 0, solver.iterations
+    return SOLVED if count else UNSATISFIABLE, count, solver.iterations
+
+
+def split_board(board, target):
+    """Expands the top of the MRV search tree breadth first.
+
+    Returns (subproblems, nodes): subproblems are grids holding a partial
+    assignment, in the order the sequential search would visit them, and
+    there are at least target of them unless the tree runs out first.
+    Grids the expansion already completed are kept as subproblems too.
+    The board is left as it was.
+    """
+    solver = SudokuSolver(board)
+    frontier = deque([[]])
+    leaves = []
+    nodes = 0
+    while frontier and len(frontier) + len(leaves) < target:
+        moves = frontier.popleft()
+        mark = board.trail_mark()
+        for cell, value in moves:
+            board.move(cell[0], cell[1], value)
+        nodes += 1
+        cell = solver.select_variable()
+        if cell is None:
+            # already complete, nothing left to split
+            leaves.append(moves)
+            board.undo(mark)
+            continue
+        for value in solver.order_domain_values(cell):
+            child_mark = board.trail_mark()
+            if board.move(cell[0], cell[1], value):
+                (leaves if board.is_complete() else frontier).append(moves + [(cell, value)])
+            board.undo(child_mark)
+        board.undo(mark)
+
+    subproblems = []
+    for moves in leaves + list(frontier):
+        mark = board.trail_mark()
+        for cell, value in moves:
+            board.move(cell[0], cell[1], value)
+        subproblems.append([row[:] for row in board.grid])
+        board.undo(mark)
+    return subproblems, nodes
+
+
+class ParallelSolver:
+    # Splits the search tree into independent subproblems and solves them on
+    # a process pool. Subproblems are submitted one per task in search order,
+    # so a worker that finishes a branch pulls the next one; the first
+    # solution stops the others through a shared event. It starts its own
+    # pool, so it stays out of sudoku_engines: batch workers cannot host one.
+    def __init__(self, board: SudokuBoard, workers=None, split_factor=8):
+        self.board = board
+        self.workers = workers or os.cpu_count() or 1
+        # subproblems per worker, more balances better but splits longer
+        self.split_factor = split_factor
+        self.steps = []
+        self.iterations = 0
+        self.subproblems = 0
+        self.time = 0
+        self.status = None
+
+    def run(self, task, args, done, cancel_event=None):
+        """Runs task over every subproblem, returns the results it got.
+
+        done(result) sees results as they arrive and returns True once no
+        more are needed; queued subproblems are then dropped and running
+        ones stopped, as they are once cancel_event is set.
+        """
+        subproblems, nodes = split_board(self.board, self.workers * self.split_factor)
+        self.iterations += nodes
+        self.subproblems = len(subproblems)
+        stop_event = multiprocessing.Event()
+        results = []
+        with ProcessPoolExecutor(self.workers, initializer=sudoku_workers.init_worker,
+                                 initargs=(stop_event,)) as executor:
+            pending = {executor.submit(task, grid, *args) for grid in subproblems}
+            while pending:
+                finished, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+                if not stop_event.is_set() and cancel_event is not None and cancel_event.is_set():
+                    stop_event.set()
+                    for queued in pending:
+                        queued.cancel()
+                for future in finished:
+                    if future.cancelled():
+                        continue
+                    results.append(future.result())
+                    if not stop_event.is_set() and done(results[-1]):
+                        stop_event.set()
+                        for queued in pending:
+                            queued.cancel()
+        for result in results:
+            self.iterations += result[2]
+        return results
+
+    def solve(self, max_nodes=None, timeout=None, cancel_event=None):
+        # max_nodes and timeout bound each subproblem; cancel_event is polled
+        # while the workers run and stops them through the shared event
+        start_time = time.time()
+
+        def done(result):
+            return result[0] == SOLVED
+
+        results = self.run(_solve_subproblem, (self.board.rules, max_nodes, timeout), done, cancel_event)
+        statuses = {status for status, _, _ in results}
+        solution = next((grid for status, grid, _ in results if status == SOLVED), None)
+        if solution is not None:
+            self.status = SOLVED
+            self.steps.extend(apply_solution(self.board, enumerate(value for row in solution for value in row)))
+        elif cancel_event is not None and cancel_event.is_set():
+            self.status = CANCELLED
+        elif BUDGET_EXHAUSTED in statuses:
+            self.status = BUDGET_EXHAUSTED
+        else:
+            self.status = UNSATISFIABLE
+        self.time = time.time() - start_time
+        return {'status': self.status, 'time': self.time, 'nodes': self.iterations, 'subproblems': self.subproblems}
+
+    def count_solutions(self, limit=None, max_nodes=None, timeout=None, cancel_event=None):
+        # per-branch counts are summed, workers stop once limit is reached
+        total = 0
+
+        def done(result):
+            nonlocal total
+            total += result[1]
+            return limit is not None and total >= limit
+
+        results = self.run(_count_subproblem, (self.board.rules, limit, max_nodes, timeout), done, cancel_event)
+        if limit is not None and total >= limit:
+            return limit
+        if cancel_event is not None and cancel_event.is_set():
+            raise SearchAborted(CANCELLED)
+        if any(status == BUDGET_EXHAUSTED for status, _, _ in results):
+            raise SearchAborted(BUDGET_EXHAUSTED)
+        return total
+
+    def iter_steps(self, max_nodes=None, timeout=None, cancel_event=None):
+        self.solve(max_nodes, timeout, cancel_event)
+        yield from self.steps
+
+
+def hard_corpus(sizes):
+    corpus = {name: parse_puzzle(line) for name, line in HARD_PUZZLES.items()}
+    for size in sizes:
+        corpus[f"{size}x{size}"] = SudokuUtils.generate_sparse_board(size * size * 3 // 10, size)
+    return corpus
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Speedup of the parallel solver over the sequential one.")
+    parser.add_argument('-w', '--workers', type=int, nargs='+', default=[os.cpu_count() or 1])
+    parser.add_argument('--sizes', type=int, nargs='*', default=[16], help="random larger boards to add")
+    parser.add_argument('--propagation', default='singles', help="propagation level for both solvers")
+    parser.add_argument('--seed', type=int, default=2024)
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    print(f"{os.cpu_count()} cores available")
+    for name, puzzle in hard_corpus(args.sizes).items():
+        sudoku_board = SudokuBoard(len(puzzle), args.propagation)
+        sudoku_board.fill(puzzle)
+        start_time = time.perf_counter()
+        solver = SudokuSolver(sudoku_board)
+        solver.solve()
+        sequential = time.perf_counter() - start_time
+        print(f"{name}: sequential {sequential:.3f}s, {solver.iterations} nodes")
+        for workers in args.workers:
+            sudoku_board = SudokuBoard(len(puzzle), args.propagation)
+            sudoku_board.fill(puzzle)
+            start_time = time.perf_counter()
+            solver = ParallelSolver(sudoku_board, workers)
+            solver.solve()
+            parallel = time.perf_counter() - start_time
+            print(f"  {workers} workers: {parallel:.3f}s, {solver.iterations} nodes over "
+                  f"{solver.subproblems} subproblems, speedup {sequential / parallel:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from SudokuBoard import SudokuBoard, mask_values
+from SudokuSolver import BUDGET_EXHAUSTED, CANCELLED, SOLVED, UNSATISFIABLE, SudokuSolver, apply_solution
+import sudoku_workers
+from sudoku_io import format_grid, parse_puzzle
+from sudoku_puzzles import HARD_PUZZLES
+
+
+class RandomizedSolver(SudokuSolver):
+    # MRV and LCV with random tie-breaks, restarted with a geometrically
+    # growing node budget, which cuts off the heavy tail of unlucky orders
+    def __init__(self, board: SudokuBoard, seed=None, restart_nodes=64, restart_growth=2, **kwargs):
+        super().__init__(board, **kwargs)
+        self.rng = random.Random(seed)
+        self.restart_nodes = restart_nodes
+        self.restart_growth = restart_growth
+        self.restarts = 0
+
+    def select_variable(self):
+        bucket = next((bucket for bucket in self.board.buckets if bucket), None)
+        # sorted, so a seed reproduces the same search
+        return divmod(self.rng.choice(sorted(bucket)), self.board.size) if bucket else None
+
+    def order_domain_values(self, cell):
+        idx = cell[0] * self.board.size + cell[1]
+        values = mask_values(self.board.masks[idx])
+        # shuffled first, the stable sort then breaks score ties at random
+        self.rng.shuffle(values)
+        values_score = self.value_scores(idx, values)
+        return sorted(values, key=lambda value: values_score[value])
+
+    def solve(self, max_nodes=None, timeout=None, cancel_event=None):
+        # each restart searches from the original board with a fresh random
+        # order; max_nodes and timeout still bound the whole run
+        start_time = time.time()
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        budget = self.restart_nodes
+        while True:
+            restart_limit = self.iterations + budget
+            if max_nodes is not None:
+                restart_limit = min(restart_limit, max_nodes)
+            remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            outcome = super().solve(restart_limit, remaining, cancel_event)
+            out_of_budget = (max_nodes is not None and self.iterations > max_nodes) or \
+                (deadline is not None and time.perf_counter() > deadline)
+            if self.status != BUDGET_EXHAUSTED or out_of_budget:
+                break
+            self.restarts += 1
+            budget *= self.restart_growth
+        self.time = time.time() - start_time
+        return {**outcome, 'time': self.time, 'restarts': self.restarts}
+
+
+class DegreeSolver(SudokuSolver):
+    # MRV with ties broken by degree: the cell with the most empty peers
+    # constrains the rest of the board the most
+    def select_variable(self):
+        return self.board.select_cell(degree=True)
+
+
+CONFIGURATIONS = {
+    'mrv_lcv': SudokuSolver,
+    'random_restarts': RandomizedSolver,
+    'degree': DegreeSolver,
+}
+
+
+def make_solver(name, board, seed=None):
+    solver_class = CONFIGURATIONS[name]
+    if solver_class is RandomizedSolver:
+        return RandomizedSolver(board, seed=seed)
+    return solver_class(board)
+
+
+def _run_configuration(name, grid, rules, seed, max_nodes, timeout):
+    sudoku_board = SudokuBoard(len(grid), rules)
+    if not sudoku_board.fill(grid):
+        return name, UNSATISFIABLE, None, 0
+    outcome = make_solver(name, sudoku_board, seed).solve(max_nodes, timeout, sudoku_workers.stop_event)
+    return name, outcome['status'], sudoku_board.grid if outcome['status'] == SOLVED else None, outcome['nodes']
+
+
+class PortfolioSolver:
+    # Races the configurations in separate processes on the same board. The
+    # first definite answer (solved or unsatisfiable) wins, the others are
+    # stopped through a shared event. With log_path every race is appended as
+    # a JSON line, so win_counts can show which configuration to default to.
+    def __init__(self, board: SudokuBoard, configurations=None, log_path=None, seed=None):
+        self.board = board
+        self.configurations = list(configurations or CONFIGURATIONS)
+        self.log_path = log_path
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.steps = []
+        self.iterations = 0
+        self.time = 0
+        self.status = None
+        self.winner = None
+
+    def solve(self, max_nodes=None, timeout=None, cancel_event=None):
+        start_time = time.time()
+        puzzle = [row[:] for row in self.board.grid]
+        stop_event = multiprocessing.Event()
+        results = []
+        with ProcessPoolExecutor(len(self.configurations), initializer=sudoku_workers.init_worker,
+                                 initargs=(stop_event,)) as executor:
+            pending = {executor.submit(_run_configuration, name, puzzle, self.board.rules, self.seed,
+                                       max_nodes, timeout) for name in self.configurations}
+            while pending:
+                finished, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+                if cancel_event is not None and cancel_event.is_set():
+                    stop_event.set()
+                for future in finished:
+                    results.append(future.result())
+                    if self.winner is None and results[-1][1] in (SOLVED, UNSATISFIABLE):
+                        self.winner = results[-1][0]
+                        stop_event.set()
+
+        self.iterations = sum(nodes for _, _, _, nodes in results)
+        won = next((result for result in results if result[0] == self.winner), None)
+        if won is not None:
+            self.status = won[1]
+            if won[2] is not None:
+                self.steps.extend(apply_solution(self.board, enumerate(value for row in won[2] for value in row)))
+        elif cancel_event is not None and cancel_event.is_set():
+            self.status = CANCELLED
+        else:
+            self.status = BUDGET_EXHAUSTED
+        self.time = time.time() - start_time
+        if self.log_path:
+            self.log(puzzle, results)
+        return {'status': self.status, 'time': self.time, 'nodes': self.iterations, 'winner': self.winner}
+
+    def log(self, puzzle, results):
+        record = {
+            'puzzle': format_grid(puzzle),
+            'winner': self.winner,
+            'status': self.status,
+            'time': self.time,
+            'seed': self.seed,
+            'nodes': {name: nodes for name, _, _, nodes in results},
+        }
+        with open(self.log_path, 'a') as log_file:
+            log_file.write(json.dumps(record) + '\n')
+
+    def iter_steps(self, max_nodes=None, timeout=None, cancel_event=None):
+        self.solve(max_nodes, timeout, cancel_event)
+        yield from self.steps
+
+
+def win_counts(log_path):
+    with open(log_path) as log_file:
+        return Counter(json.loads(line)['winner'] for line in log_file if line.strip())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Race solver configurations on the hard puzzles.")
+    parser.add_argument('--log', default=None, help="JSON lines file the races are appended to")
+    parser.add_argument('--propagation', default='basic', help="propagation level for every configuration")
+    parser.add_argument('--seed', type=int, default=2024)
+    args = parser.parse_args(argv)
+
+    for name, line in HARD_PUZZLES.items():
+        puzzle = parse_puzzle(line)
+        sudoku_board = SudokuBoard(len(puzzle), args.propagation)
+        sudoku_board.fill(puzzle)
+        solver = PortfolioSolver(sudoku_board, log_path=args.log, seed=args.seed)
+        outcome = solver.solve()
+        print(f"{name}: {outcome['status']} by {outcome['winner']} in {outcome['time']:.3f}s")
+        for configuration in CONFIGURATIONS:
+            sudoku_board = SudokuBoard(len(puzzle), args.propagation)
+            sudoku_board.fill(puzzle)
+            result = make_solver(configuration, sudoku_board, args.seed).solve()
+            print(f"  {configuration}: {result['nodes']} nodes, {result['time']:.3f}s alone")
+    if args.log:
+        print(dict(win_counts(args.log)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
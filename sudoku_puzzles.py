@@ -0,0 +1,9 @@
+# Puzzle data shared by the solvers' reports and benchmarks, kept apart from
+# testing.py so library modules can use it without importing a report script.
+
+# well-known hard 9x9 puzzles, row-major with '.' for empty cells
+HARD_PUZZLES = {
+    'Norvig hardest': "4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......",
+    'Inkala 2012': "8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4..",
+    'AI Escargot': "1....7.9..3..2...8..96..5....53..9...1..8...26....4...3......1..4......7..7...3..",
+}
@@ -0,0 +1,163 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+from SudokuBoard import PROPAGATION_LEVELS, SudokuBoard
+from SudokuSolver import SudokuSolver
+from sudoku_io import format_grid
+from sudoku_utils import SudokuUtils
+
+# propagation levels tried in order when rating, see PROPAGATION_LEVELS
+RATING_LEVELS = tuple(PROPAGATION_LEVELS)
+# rating band -> the lowest propagation levels that may solve its puzzles
+# without search; None stands for puzzles no level solves on its own
+BANDS = {
+    'Easy': ('basic', 'singles'),
+    'Medium': ('intersections', 'subsets'),
+    'Hard': (None,),
+}
+# clue target of each band's candidates, picked so
+# a good share of candidates lands in the band; greedy removal stops in the
+# low twenties anyway, so Hard asks for the minimum
+CANDIDATE_CLUES = {'Easy': 45, 'Medium': 24, 'Hard': 17}
+
+
+def rate_puzzle(puzzle):
+    """Measured solving effort of a puzzle.
+
+    level is the first propagation level that fills every cell without
+    search (None when none does), nodes and backtracks come from a
+    SudokuSolver search with basic propagation.
+    """
+    size = len(puzzle)
+    level = None
+    for candidate in RATING_LEVELS:
+        sudoku_board = SudokuBoard(size, candidate)
+        sudoku_board.fill(puzzle)
+        if all(not mask & (mask - 1) for mask in sudoku_board.masks):
+            level = candidate
+            break
+    sudoku_board = SudokuBoard(size)
+    sudoku_board.fill(puzzle)
+    solver = SudokuSolver(sudoku_board)
+    solver.solve()
+    return {
+        'clues': sum(1 for row in puzzle for value in row if value),
+        'level': level,
+        'nodes': solver.iterations,
+        'backtracks': solver.backtracks,
+    }
+
+
+def band_of(rating):
+    for band, levels in BANDS.items():
+        if rating['level'] in levels:
+            return band
+    return None
+
+
+def _rated_candidate(non_empty_cells, size, seed):
+    # workers start from a copy of the parent's random state, so each task seeds its own
+    random.seed(seed)
+    complete_board = SudokuUtils.generate_complete_board(size)
+    puzzle = SudokuUtils.remove_cells(complete_board, non_empty_cells).tolist()
+    return puzzle, complete_board.tolist(), rate_puzzle(puzzle)
+
+
+class RatedGenerator:
+    # Rejection sampling on a process pool: candidates are generated and
+    # rated by the workers, the parent keeps those rated into band (and
+    # within the backtrack range) and throws the rest away. A bounded number
+    # of tasks is kept in flight, the queued ones are dropped once enough
+    # puzzles are in.
+    def __init__(self, band, workers=None, size=9, min_backtracks=0, max_backtracks=None, seed=None):
+        if band not in BANDS:
+            raise ValueError(f"Unknown rating band {band!r}, expected one of {', '.join(BANDS)}")
+        self.band = band
+        self.workers = workers or os.cpu_count() or 1
+        self.size = size
+        self.min_backtracks = min_backtracks
+        self.max_backtracks = max_backtracks
+        self.rng = random.Random(seed)
+        self.candidates = 0
+        self.accepted = 0
+        self.time = 0
+
+    def accepts(self, rating):
+        if band_of(rating) != self.band or rating['backtracks'] < self.min_backtracks:
+            return False
+        return self.max_backtracks is None or rating['backtracks'] <= self.max_backtracks
+
+    def generate(self, count):
+        # yields (puzzle, solution, rating) as they are accepted; the counters
+        # and time cover this run only
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+        start_time = time.perf_counter()
+        non_empty_cells = CANDIDATE_CLUES[self.band] * self.size * self.size // 81
+        self.candidates = 0
+        self.accepted = 0
+        with ProcessPoolExecutor(self.workers) as executor:
+            def submit():
+                return executor.submit(_rated_candidate, non_empty_cells, self.size, self.rng.randrange(2 ** 32))
+
+            pending = {submit() for _ in range(self.workers * 2)}
+            while self.accepted < count:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    puzzle, solution, rating = future.result()
+                    self.candidates += 1
+                    if self.accepted < count and self.accepts(rating):
+                        self.accepted += 1
+                        self.time = time.perf_counter() - start_time
+                        yield puzzle, solution, rating
+                    pending.add(submit())
+            for future in pending:
+                future.cancel()
+        self.time = time.perf_counter() - start_time
+
+    def throughput(self):
+        # accepted puzzles per second of the last generate() run
+        return self.accepted / self.time if self.time else 0.0
+
+
+def main(argv=None):
+    from PuzzleBank import PuzzleBankWriter
+
+    parser = argparse.ArgumentParser(description="Generate puzzles rated into difficulty bands by solving effort.")
+    parser.add_argument('-k', '--count', type=int, default=10, help="puzzles wanted per band")
+    parser.add_argument('-b', '--bands', nargs='+', choices=list(BANDS), default=list(BANDS))
+    parser.add_argument('-w', '--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--min-backtracks', type=int, default=0, help="reject easier searches")
+    parser.add_argument('--max-backtracks', type=int, default=None, help="reject harder searches")
+    parser.add_argument('--bank', default=None, help="puzzle bank file to append the accepted puzzles to")
+    parser.add_argument('-o', '--output', default=None, help="text file for the accepted puzzles, one per line")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    bank = PuzzleBankWriter(args.bank) if args.bank else None
+    sink = open(args.output, 'a') if args.output else None
+    try:
+        for band in args.bands:
+            generator = RatedGenerator(band, args.workers, min_backtracks=args.min_backtracks,
+                                       max_backtracks=args.max_backtracks, seed=args.seed)
+            for puzzle, solution, rating in generator.generate(args.count):
+                if bank is not None:
+                    bank.append(puzzle, solution, band, rating['nodes'])
+                if sink is not None:
+                    sink.write(format_grid(puzzle) + '\n')
+            print(f"{band}: {generator.accepted} puzzles in {generator.time:.2f} seconds "
+                  f"({generator.throughput():.2f} puzzles/sec), {generator.candidates} candidates rated, "
+                  f"{generator.accepted / max(generator.candidates, 1):.0%} accepted", file=sys.stderr)
+    finally:
+        if bank is not None:
+            bank.close()
+        if sink is not None:
+            sink.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import numpy as np
+
+from SudokuTopology import get_topology
+
+
+def random_permutations(rng, count, length):
+    # one independent random permutation of range(length) per row
+    return np.argsort(rng.random((count, length)), axis=1)
+
+
+def random_line_permutations(rng, count, size):
+    # row (or column) orders that keep every band together: bands are
+    # shuffled, then lines are shuffled inside each band
+    box_size = get_topology(size).box_size
+    bands = random_permutations(rng, count, box_size)
+    lines = np.argsort(rng.random((count, box_size, box_size)), axis=2)
+    return (bands[:, :, None] * box_size + lines).reshape(count, size)
+
+
+def random_cell_indices(rng, count, size):
+    """Flat source index of every output cell for count random symmetries.
+
+    Row and column orders are drawn per puzzle and half of the puzzles are
+    transposed. Rotations and reflections are compositions of these, so they
+    are sampled as well.
+    """
+    rows = random_line_permutations(rng, count, size)
+    cols = random_line_permutations(rng, count, size)
+    straight = rows[:, :, None] * size + cols[:, None, :]
+    transposed = cols[:, None, :] * size + rows[:, :, None]
+    transpose = rng.random(count) < 0.5
+    return np.where(transpose[:, None, None], transposed, straight).reshape(count, size * size)
+
+
+def random_relabelings(rng, count, size):
+    # lookup tables mapping each value to its new label, 0 (empty) stays 0
+    tables = np.zeros((count, size + 1), dtype=np.int64)
+    tables[:, 1:] = random_permutations(rng, count, size) + 1
+    return tables
+
+
+def derive_puzzles(seeds, count, rng=None, solutions=None):
+    """Derives count puzzles from already verified seed puzzles.
+
+    Every output is a seed pushed through a random validity-preserving
+    transform (digit relabeling, row swaps within a band, band swaps, column
+    and stack swaps, transposition), so it keeps the seed's unique solution
+    and needs no re-verification. The whole batch is built with array
+    operations. When solutions are given (aligned with seeds), the matching
+    derived solutions are returned as well.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    seeds = np.asarray(seeds)
+    seed_count, size = seeds.shape[0], seeds.shape[1]
+    cells = size * size
+
+    picks = rng.integers(seed_count, size=count)
+    indices = random_cell_indices(rng, count, size)
+    tables = random_relabelings(rng, count, size)
+
+    puzzles = np.take_along_axis(tables, seeds.reshape(seed_count, cells)[picks[:, None], indices], axis=1)
+    puzzles = puzzles.reshape(count, size, size).astype(seeds.dtype)
+    if solutions is None:
+        return puzzles
+
+    solutions = np.asarray(solutions)
+    derived = np.take_along_axis(tables, solutions.reshape(seed_count, cells)[picks[:, None], indices], axis=1)
+    return puzzles, derived.reshape(count, size, size).astype(solutions.dtype)
@@ -1,98 +1,163 @@
-import numpy as np
 import random
+from itertools import islice
+
+from SudokuBoard import SudokuBoard
+from SudokuSolver import SudokuSolver
+from SudokuTopology import get_topology
+
+# NumPy is only imported by the generators that return arrays, so solving,
+# counting and validating stay cheap to import in CLI and worker processes
 
 class SudokuUtils:
 
     @staticmethod
     def is_valid_move(board, row, col, value):
-        if not 1 <= int(value) <= 9:
+        size = len(board)
+        if not 1 <= int(value) <= size:
             return False
-        # checking rows and cols
-        for i in range(9):
-            if i != col and board[row][i] == value or i != row and board[i][col] == value:
+        topology = get_topology(size)
+        for peer in topology.peers[row * size + col]:
+            if board[topology.row_of[peer]][topology.col_of[peer]] == value:
                 return False
-        # checking 3 * 3 boxes
-        box_start_row = (row // 3) * 3
-        box_start_col = (col // 3) * 3
-        for i in range(3):
-            for j in range(3):
-                if box_start_col+j != col and box_start_row+i !=row and board[box_start_row + i][box_start_col + j] == value:
-                    return False
         return True
 
 
     @staticmethod
-    def solve_sudoku(board, cnt=[], check_uniqueness=False):
-
-        if check_uniqueness and cnt[0] > 1:
-            return
-        
-        for row in range(9):
-            for col in range(9):
-                if board[row][col] == 0:
-                    numbers = list(range(1, 10))
-                    random.shuffle(numbers)
-                    for num in numbers:
-                        if SudokuUtils.is_valid_move(board, row, col, num):
-                            board[row][col] = num
-                            solved = SudokuUtils.solve_sudoku(board, cnt, check_uniqueness)
-                            if solved and not check_uniqueness:
-                                return True
-                            board[row][col] = 0
-                    return False
-                
-        if not check_uniqueness:
-            return True
-        
-        cnt[0] += 1
-
+    def solve_sudoku(board, cnt=None, check_uniqueness=False):
+        # fills board in place with its first solution and returns whether it
+        # has one; with check_uniqueness it only adds the number of solutions,
+        # counted up to 2, to cnt[0]
+        if check_uniqueness:
+            if cnt is None:
+                cnt = [0]
+            cnt[0] += SudokuUtils.count_solutions(board, 2)
+            return cnt[0] > 0
+        solution = next(SudokuUtils.iter_solutions(board), None)
+        if solution is None:
+            return False
+        for row, values in enumerate(solution):
+            for col, value in enumerate(values):
+                board[row][col] = value
+        return True
 
     @staticmethod
-    def generate_complete_board():
-        board = np.zeros((9, 9), dtype=int)
-        SudokuUtils.solve_sudoku(board)
-        return board
+    def generate_complete_board(size=9):
+        # the diagonal boxes share no row or column, so each can take a random
+        # permutation; the propagating solver completes the rest. Its run time
+        # is heavy-tailed on large boards, so unlucky seeds are restarted.
+        import numpy as np
+
+        box_size = get_topology(size).box_size
+        while True:
+            grid = [[0 for _ in range(size)] for _ in range(size)]
+            for box in range(box_size):
+                values = random.sample(range(1, size + 1), size)
+                for i, value in enumerate(values):
+                    grid[box * box_size + i // box_size][box * box_size + i % box_size] = value
+            sudoku_board = SudokuBoard(size)
+            sudoku_board.fill(grid)
+            SudokuSolver(sudoku_board).solve(max_nodes=4 * size * size)
+            if sudoku_board.is_complete():
+                return np.array(sudoku_board.grid, dtype=int)
 
     @staticmethod
     def remove_cells(board, non_empty_cells):
+        size = len(board)
         puzzle = board.copy()
-        cells = [(i, j) for i in range(9) for j in range(9)]
+        cells = [(i, j) for i in range(size) for j in range(size)]
         random.shuffle(cells)
+        filled = sum(1 for row in puzzle for value in row if value)
 
         for row, col in cells:
             temp = puzzle[row][col]
             puzzle[row][col] = 0
-            if not SudokuUtils.is_unique_solution(puzzle.copy()):
+            if not SudokuUtils.is_unique_solution(puzzle):
                 puzzle[row][col] = temp
+            elif temp:
+                filled -= 1
 
-            if np.count_nonzero(puzzle) <= non_empty_cells:
+            if filled <= non_empty_cells:
                 break
         return puzzle
     
 
     @staticmethod
-    def is_unique_solution(board):
-        cnt = [0]
-        SudokuUtils.solve_sudoku(board, cnt, check_uniqueness=True)
-        return cnt[0] == 1
+    def count_solutions(board, limit=2, propagation='singles', max_nodes=None, timeout=None, cancel_event=None):
+        # constraint-propagating search that stops at limit solutions, raises
+        # SearchAborted when the node or time budget runs out or it is cancelled
+        sudoku_board = SudokuBoard(len(board), propagation)
+        if not sudoku_board.fill(board):
+            return 0
+        return SudokuSolver(sudoku_board).count_solutions(limit, max_nodes, timeout, cancel_event)
+
+    @staticmethod
+    def iter_solutions(board, propagation='singles', max_nodes=None, timeout=None, cancel_event=None):
+        sudoku_board = SudokuBoard(len(board), propagation)
+        if not sudoku_board.fill(board):
+            return
+        solver = SudokuSolver(sudoku_board)
+        solver.set_limits(max_nodes, timeout, cancel_event)
+        yield from solver.iter_solutions()
+
+    @staticmethod
+    def is_unique_solution(board, cache=None, max_nodes=None, timeout=None, cancel_event=None):
+        if cache is None:
+            return SudokuUtils.count_solutions(board, 2, max_nodes=max_nodes, timeout=timeout,
+                                               cancel_event=cancel_event) == 1
+        entry = cache.lookup(board)
+        if entry is not None and entry[1] is not None:
+            return entry[1] == 1
+        solutions = list(islice(SudokuUtils.iter_solutions(board, max_nodes=max_nodes, timeout=timeout,
+                                                           cancel_event=cancel_event), 2))
+        cache.store(board, solutions[0] if solutions else None, len(solutions))
+        return len(solutions) == 1
 
 
     @staticmethod
-    def generate_sudoku(non_empty_cells=30):
-        complete_board = SudokuUtils.generate_complete_board()
+    def generate_sudoku(non_empty_cells=30, size=9, bank=None):
+        # with a PuzzleBankWriter the puzzle is also appended to the bank,
+        # along with its solution and the nodes SudokuSolver needs for it
+        complete_board = SudokuUtils.generate_complete_board(size)
         puzzle = SudokuUtils.remove_cells(complete_board, non_empty_cells)
+        if bank is not None:
+            sudoku_board = SudokuBoard(size)
+            sudoku_board.fill(puzzle)
+            solver = SudokuSolver(sudoku_board)
+            solver.solve()
+            bank.append(puzzle, complete_board, nodes=solver.iterations)
         return puzzle
 
 
     @staticmethod
-    def is_solvable(board):
-        return SudokuUtils.solve_sudoku(board.copy())
+    def generate_sparse_board(non_empty_cells, size=9):
+        # random clues of a complete board: always solvable, not necessarily
+        # unique, and much quicker than generate_sudoku on large boards
+        grid = SudokuUtils.generate_complete_board(size).tolist()
+        cells = set(random.sample(range(size * size), non_empty_cells))
+        return [[grid[row][col] if row * size + col in cells else 0 for col in range(size)] for row in range(size)]
+
+
+    @staticmethod
+    def generate_sudoku_batch(count, non_empty_cells=30, size=9, seeds=None, seed_count=8, rng=None):
+        # a few puzzles are generated and verified the slow way, the rest are
+        # isomorphic copies of them (see sudoku_transforms.derive_puzzles)
+        from sudoku_transforms import derive_puzzles
+
+        if seeds is None:
+            seeds = [SudokuUtils.generate_sudoku(non_empty_cells, size) for _ in range(seed_count)]
+        return derive_puzzles(seeds, count, rng)
+
+
+    @staticmethod
+    def is_solvable(board, max_nodes=None, timeout=None, cancel_event=None):
+        return SudokuUtils.count_solutions(board, 1, max_nodes=max_nodes, timeout=timeout,
+                                           cancel_event=cancel_event) == 1
 
     @staticmethod
     def is_complete(board):
         # Check if the board is completely filled
-        for row in range(9):
-            for col in range(9):
+        for row in range(len(board)):
+            for col in range(len(board)):
                 if board[row][col] == 0:
                     return False
         return True
@@ -100,8 +165,8 @@ class SudokuUtils:
     @staticmethod
     def is_valid_board(board):
         # Check if the board is valid even if not filled
-        for row in range(9):
-            for col in range(9):
+        for row in range(len(board)):
+            for col in range(len(board)):
                 value = board[row][col]
                 if value == 0:
                     continue
@@ -126,6 +191,6 @@ if __name__ == "__main__":
     
     print("Generated Sudoku Puzzle:")
     print(puzzle)
-    print(np.count_nonzero(puzzle))
+    print(sum(1 for row in puzzle for value in row if value))
     print(SudokuUtils.is_solvable(puzzle))
 
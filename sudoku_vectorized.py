@@ -0,0 +1,127 @@
+import numpy as np
+
+from SudokuBoard import SudokuBoard
+from SudokuSolver import SudokuSolver
+from SudokuTopology import get_topology
+
+OPEN = 0
+SOLVED = 1
+CONTRADICTED = -1
+
+
+def mask_dtype(size):
+    return np.uint16 if size <= 16 else np.uint32
+
+
+def popcount(masks):
+    # SWAR bit count, elementwise over an unsigned integer array
+    masks = masks.astype(np.uint32)
+    masks = masks - ((masks >> 1) & 0x55555555)
+    masks = (masks & 0x33333333) + ((masks >> 2) & 0x33333333)
+    masks = (masks + (masks >> 4)) & 0x0F0F0F0F
+    return ((masks * 0x01010101) & 0xFFFFFFFF) >> 24
+
+
+def candidates_from_grids(grids):
+    """(N, size * size) candidate bitmasks for a batch of grids.
+
+    Empty cells start with every value, clues with their own bit only.
+    """
+    grids = np.asarray(grids)
+    count = grids.shape[0]
+    cells = grids.reshape(count, -1).astype(np.int64)
+    size = int(round(cells.shape[1] ** 0.5))
+    dtype = mask_dtype(size)
+    full_mask = (1 << size) - 1
+    clue_bits = np.left_shift(1, np.maximum(cells - 1, 0))
+    return np.where(cells > 0, clue_bits, full_mask).astype(dtype)
+
+
+def grids_from_candidates(candidates):
+    # value of every single-candidate cell, 0 where the cell is still open
+    size = int(round(candidates.shape[1] ** 0.5))
+    counts = popcount(candidates)
+    values = popcount(candidates.astype(np.int64) - 1) + 1
+    grids = np.where(counts == 1, values, 0)
+    return grids.reshape(candidates.shape[0], size, size).astype(np.int64)
+
+
+def propagate_batch(grids, max_rounds=None):
+    """Naked and hidden single elimination over a whole batch at once.
+
+    Returns the (N, size * size) candidate array and an (N,) status array
+    of OPEN, SOLVED or CONTRADICTED. Each round works on every still-open
+    puzzle with whole-array operations over the precomputed peer and unit
+    index arrays; a puzzle leaves the batch once it is solved, contradicted
+    or stops changing.
+    """
+    candidates = candidates_from_grids(grids)
+    count, cells = candidates.shape
+    size = int(round(cells ** 0.5))
+    topology = get_topology(size)
+    full_mask = (1 << size) - 1
+    peers = np.array(topology.peers)
+    units = np.array(topology.units)
+    cell_unit_ids = np.array(topology.cell_unit_ids)
+
+    status = np.full(count, OPEN, dtype=np.int8)
+    active = np.arange(count)
+    rounds = 0
+    while active.size and (max_rounds is None or rounds < max_rounds):
+        rounds += 1
+        current = candidates[active]
+        singles = np.where(popcount(current) == 1, current, 0)
+
+        # naked singles: a placed value leaves every peer
+        taken = np.bitwise_or.reduce(singles[:, peers], axis=2)
+        reduced = np.where(singles != 0, current, current & ~taken)
+        contradicted = (reduced == 0).any(axis=1)
+        # two peers holding the same single value
+        contradicted |= ((singles[:, :, None] & singles[:, peers]) != 0).any(axis=(1, 2))
+
+        # hidden singles: a value with one place left in a unit goes there
+        unit_masks = reduced[:, units]
+        once = np.zeros(unit_masks.shape[:2], dtype=reduced.dtype)
+        twice = np.zeros_like(once)
+        for position in range(size):
+            twice |= once & unit_masks[:, :, position]
+            once |= unit_masks[:, :, position]
+        contradicted |= (once != full_mask).any(axis=1)
+        hidden = once & ~twice
+        forced = np.bitwise_or.reduce(hidden[:, cell_unit_ids], axis=2) & reduced
+        contradicted |= (popcount(forced) > 1).any(axis=1)
+        reduced = np.where(forced != 0, forced, reduced)
+
+        changed = (reduced != current).any(axis=1)
+        candidates[active] = reduced
+        # the duplicate check above saw the previous round, so a grid only
+        # counts as solved once a round leaves it unchanged
+        solved = ~contradicted & ~changed & (popcount(reduced) == 1).all(axis=1)
+        status[active[contradicted]] = CONTRADICTED
+        status[active[solved]] = SOLVED
+        active = active[changed & ~contradicted & ~solved]
+    return candidates, status
+
+
+def solve_open(grids, propagation='basic'):
+    """Screens a batch with propagate_batch and runs SudokuSolver only on
+    the puzzles it leaves open.
+
+    Returns the (N, size, size) grids (fully solved where a solution was
+    found) and the status array.
+    """
+    candidates, status = propagate_batch(grids)
+    solutions = grids_from_candidates(candidates)
+    size = solutions.shape[1]
+    for index in np.flatnonzero(status == OPEN):
+        sudoku_board = SudokuBoard(size, propagation)
+        if not sudoku_board.fill(solutions[index]):
+            status[index] = CONTRADICTED
+            continue
+        SudokuSolver(sudoku_board).solve()
+        if sudoku_board.is_complete():
+            solutions[index] = sudoku_board.grid
+            status[index] = SOLVED
+        else:
+            status[index] = CONTRADICTED
+    return solutions, status
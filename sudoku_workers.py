@@ -0,0 +1,11 @@
+# State shared with the workers of the process-pool solvers (sudoku_parallel,
+# sudoku_portfolio). Pools are started with initializer=init_worker and the
+# parent's stop event; task functions read it as sudoku_workers.stop_event.
+
+# set by the parent once no more results are needed, running searches poll it
+stop_event = None
+
+
+def init_worker(event):
+    global stop_event
+    stop_event = event
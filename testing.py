@@ -1,9 +1,14 @@
+import random
 import time
-from SudokuBoard import SudokuBoard
-from SudokuSolver import SudokuSolver
+from SudokuBoard import PROPAGATION_LEVELS, PROPAGATION_RULES, SudokuBoard
+from SudokuSolver import BUDGET_EXHAUSTED, SudokuSolver
+from sudoku_engines import ENGINES, get_solver
+from sudoku_io import parse_puzzle
+from sudoku_puzzles import HARD_PUZZLES
 from sudoku_utils import SudokuUtils
 
-def generate_report():
+
+def generate_report(engine='backtracking'):
     difficulties = {'Easy': 60, 'Medium': 45, 'Hard': 30}
     report = []
 
@@ -16,7 +21,7 @@ def generate_report():
         print(f"Initial {difficulty} board:")
         sudoku_board.print_board()
         
-        solver = SudokuSolver(sudoku_board)
+        solver = get_solver(engine)(sudoku_board)
         
         start_time = time.time()
         solver.solve()
@@ -35,7 +40,105 @@ def generate_report():
     
     return report
 
+def generate_size_report(sizes=None, runs=3):
+    # (board size, filled cells) pairs, clue counts keep generation quick
+    sizes = sizes or [(9, 30), (16, 120), (25, 450)]
+    report = []
+
+    for size, filled_cells in sizes:
+        for run in range(runs):
+            puzzle = SudokuUtils.generate_sudoku(filled_cells, size)
+            sudoku_board = SudokuBoard(size)
+
+            start_time = time.time()
+            sudoku_board.fill(puzzle)
+            solver = SudokuSolver(sudoku_board)
+            solver.solve()
+            solve_time = time.time() - start_time
+
+            solved = SudokuUtils.is_valid_solution(sudoku_board.grid)
+            report.append((size, filled_cells, solve_time, solver.iterations, solved))
+            print(f"{size}x{size} board #{run + 1} ({filled_cells} filled cells) solved={solved} "
+                  f"in {solve_time:.4f} seconds with {solver.iterations} Iterations.")
+
+    return report
+
+def generate_propagation_report(puzzles=None):
+    # search nodes and time per propagation level, plus the nodes each rule
+    # saves: the full rule set against the same set without that rule
+    puzzles = puzzles or {name: parse_puzzle(line) for name, line in HARD_PUZZLES.items()}
+    configurations = dict(PROPAGATION_LEVELS)
+    for rule in PROPAGATION_RULES:
+        configurations[f"all but {rule}"] = tuple(other for other in PROPAGATION_RULES if other != rule)
+
+    totals = {}
+    for name, rules in configurations.items():
+        iterations = 0
+        start_time = time.time()
+        for puzzle in puzzles.values():
+            sudoku_board = SudokuBoard(propagation=rules)
+            sudoku_board.fill(puzzle)
+            solver = SudokuSolver(sudoku_board)
+            solver.solve()
+            iterations += solver.iterations
+        totals[name] = (iterations, time.time() - start_time)
+        print(f"{name:>26}: {iterations:6d} Iterations in {totals[name][1]:.4f} seconds")
+
+    full_iterations = totals['subsets'][0]
+    for rule in PROPAGATION_RULES:
+        saved = totals[f"all but {rule}"][0] - full_iterations
+        print(f"{rule} saves {saved} search nodes over {len(puzzles)} puzzles")
+    return totals
+
+# a unique puzzle that backjumping once wrongly reported unsatisfiable with
+# the singles rules, see generate_backjumping_report
+BACKJUMPING_REGRESSION = "790000000100408000005000410006210009000700000510060000200000950079000008000040060"
+
+def generate_backjumping_report(puzzles=None, propagation='basic', max_nodes=20000, seed=0):
+    # search nodes with chronological backtracking against backjumping with
+    # nogoods, on the hard puzzles and sparse 16x16 boards; a search that
+    # runs out of nodes counts max_nodes. Both searches also run at every
+    # propagation level, and any status they disagree on (budget aside)
+    # raises, since backjumping must only prune what cannot succeed
+    if puzzles is None:
+        puzzles = {name: parse_puzzle(line) for name, line in HARD_PUZZLES.items()}
+        puzzles['Backjumping regression'] = parse_puzzle(BACKJUMPING_REGRESSION)
+        for run in range(8):
+            random.seed(seed + run)
+            puzzles[f"16x16 #{run + 1}"] = SudokuUtils.generate_sparse_board(77, 16)
+
+    totals = {False: 0, True: 0}
+    mismatches = []
+    for name, puzzle in puzzles.items():
+        for level in PROPAGATION_LEVELS:
+            line = []
+            statuses = []
+            for backjumping in (False, True):
+                sudoku_board = SudokuBoard(len(puzzle), level)
+                sudoku_board.fill(puzzle)
+                solver = SudokuSolver(sudoku_board, backjumping=backjumping)
+                outcome = solver.solve(max_nodes)
+                statuses.append(outcome['status'])
+                if level == propagation:
+                    totals[backjumping] += solver.iterations
+                    line.append(f"{solver.iterations:7d} nodes ({outcome['status']}, {outcome['time']:.3f}s)")
+            if statuses[0] != statuses[1] and BUDGET_EXHAUSTED not in statuses:
+                mismatches.append(f"{name} ({level}): backtracking {statuses[0]}, backjumping {statuses[1]}")
+            if line:
+                print(f"{name:>22}: backtracking {line[0]}, backjumping {line[1]}")
+    print(f"{'total':>22}: backtracking {totals[False]} nodes, backjumping {totals[True]} nodes")
+    if mismatches:
+        raise RuntimeError("Backjumping disagrees with backtracking: " + "; ".join(mismatches))
+    return totals
+
 if __name__ == "__main__":
-    report = generate_report()
-    for difficulty, solve_time, iterations in report:
-        print(f"{difficulty} puzzle solved in {solve_time:.8f} seconds with {iterations} Iterations.")
\ No newline at end of file
+    for engine in ENGINES:
+        report = generate_report(engine)
+        for difficulty, solve_time, iterations in report:
+            print(f"[{engine}] {difficulty} puzzle solved in {solve_time:.8f} seconds with {iterations} Iterations.")
+    print()
+    generate_size_report()
+    print()
+    generate_propagation_report()
+    print()
+    generate_backjumping_report()
\ No newline at end of file